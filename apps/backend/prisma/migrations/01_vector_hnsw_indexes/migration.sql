@@ -0,0 +1,21 @@
+-- =====================================================================
+-- SnackTrack: HNSW indexes for pgvector cosine similarity search
+-- =====================================================================
+-- The ML service's content recommender orders recipes by cosine
+-- distance to the user's preference vector. Without an index every
+-- request is a sequential scan over recipes.
+--
+-- HNSW (pgvector >= 0.5) needs no training step, so unlike the IVFFlat
+-- indexes sketched in 00_vectors_and_rls it can be created on an empty
+-- table and stays accurate as recipes are added. Query-time recall is
+-- tuned with hnsw.ef_search, which the ML service sets per connection
+-- (ML_HNSW_EF_SEARCH).
+-- =====================================================================
+
+CREATE INDEX IF NOT EXISTS idx_recipes_ingredient_vector_hnsw
+  ON recipes USING hnsw (ingredient_vector vector_cosine_ops)
+  WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_recipes_nutrition_vector_hnsw
+  ON recipes USING hnsw (nutrition_vector vector_cosine_ops)
+  WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,32 @@
+-- =====================================================================
+-- SnackTrack: precomputed model embeddings on recipes
+-- =====================================================================
+-- The ML service's VAE and RNN recommenders rank recipes by cosine
+-- similarity in their own 32-dimensional embedding spaces. Storing
+-- each recipe's embedding lets Postgres answer those nearest-neighbour
+-- queries from an index instead of the service re-embedding candidate
+-- recipes on every request.
+--
+-- The columns are populated by the ML service: each worker periodically
+-- embeds rows that are still NULL (newly cached recipes), and
+-- `python -m app.recommender.embeddings --all` recomputes every row after
+-- the model weights change. Rows left NULL are skipped by the index
+-- queries, and the service falls back to in-process scoring while the
+-- columns are empty.
+-- =====================================================================
+
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS vae_embedding vector(32);
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS rnn_embedding vector(32);
+
+CREATE INDEX IF NOT EXISTS idx_recipes_vae_embedding_hnsw
+  ON recipes USING hnsw (vae_embedding vector_cosine_ops)
+  WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_recipes_rnn_embedding_hnsw
+  ON recipes USING hnsw (rnn_embedding vector_cosine_ops)
+  WITH (m = 16, ef_construction = 64);
+
+-- Lets the periodic refresh find not-yet-embedded recipes without a
+-- full table scan
+CREATE INDEX IF NOT EXISTS idx_recipes_missing_embedding
+  ON recipes (id) WHERE vae_embedding IS NULL;
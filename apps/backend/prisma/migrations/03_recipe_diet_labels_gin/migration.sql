@@ -0,0 +1,15 @@
+-- =====================================================================
+-- SnackTrack: GIN index on recipe diet labels
+-- =====================================================================
+-- The ML service's knowledge-based recommender pulls recipes carrying
+-- any of the user's preferred diet labels (diet_labels && ARRAY[...])
+-- into its candidate set. A GIN index answers that overlap test without
+-- scanning every recipe.
+--
+-- allergens gets no GIN index: recipes are filtered on the absence of
+-- an allergen, compared case-insensitively, which a GIN index cannot
+-- serve.
+-- =====================================================================
+
+CREATE INDEX IF NOT EXISTS idx_recipes_diet_labels_gin
+  ON recipes USING gin (diet_labels);
@@ -7,6 +7,34 @@ class Settings(BaseSettings):
     PORT: int = 8000
     LOG_LEVEL: str = "info"
 
+    # Connection pool settings. /recommend fans out to five recommenders,
+    # each on its own connection; no connection is held across the fan-out.
+    DB_POOL_MIN: int = 6
+    DB_POOL_MAX: int = 20
+    DB_POOL_MAX_IDLE: float = 600.0
+    # Prepare every statement server-side on first use. Disable when
+    # connecting through a transaction-mode pooler (PgBouncer, Supavisor)
+    # that can't keep prepared statements per client.
+    DB_PREPARED_STATEMENTS: bool = True
+
+    # Concurrent profile lookups arriving within BATCH_WAIT_MS are fetched
+    # together, up to BATCH_MAX users per query
+    BATCH_WAIT_MS: float = 5.0
+    BATCH_MAX: int = 100
+
+    # In-process taste profile cache (rows and misses), shared by the
+    # recommenders of a hybrid request
+    PROFILE_CACHE_MAX: int = 10_000
+    PROFILE_CACHE_TTL_S: float = 60.0
+
+    # pgvector HNSW candidate list size (higher = better recall, slower).
+    # A floor: queries with a larger LIMIT raise it for their transaction.
+    HNSW_EF_SEARCH: int = 64
+
+    # How often each worker embeds newly cached recipes (stored VAE/RNN
+    # embeddings)
+    EMBEDDING_REFRESH_INTERVAL_S: float = 60.0
+
     # Recommendation settings
     DEFAULT_TOP_N: int = 10
     CONTENT_WEIGHT: float = 0.6
@@ -1,7 +1,9 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 import psycopg
+from psycopg import sql
 from psycopg.rows import dict_row
 from psycopg_pool import AsyncConnectionPool
 from pgvector.psycopg import register_vector_async
@@ -15,15 +17,36 @@ async def init_db() -> None:
     global _pool
     _pool = AsyncConnectionPool(
         settings.DATABASE_URL,
-        min_size=2,
-        max_size=10,
-        kwargs={"row_factory": dict_row},
+        min_size=settings.DB_POOL_MIN,
+        max_size=settings.DB_POOL_MAX,
+        max_idle=settings.DB_POOL_MAX_IDLE,
+        kwargs={
+            "row_factory": dict_row,
+            # 0 = prepare on first execution, None = never prepare
+            "prepare_threshold": 0 if settings.DB_PREPARED_STATEMENTS else None,
+        },
+        configure=_configure_connection,
+        open=False,
     )
-    await _pool.open()
+    # Block startup until the initial connections are ready
+    await _pool.open(wait=True)
+    await asyncio.gather(*(_warm_connection(_pool) for _ in range(settings.DB_POOL_MIN)))
 
-    # Register pgvector type with a test connection
-    async with _pool.connection() as conn:
-        await register_vector_async(conn)
+
+async def _configure_connection(conn: psycopg.AsyncConnection) -> None:
+    """Per-physical-connection setup, run once when the pool opens it."""
+    await register_vector_async(conn)
+    await conn.execute(
+        sql.SQL("SET hnsw.ef_search = {}").format(settings.HNSW_EF_SEARCH)
+    )
+    # The pool expects configured connections to be handed back idle
+    await conn.commit()
+
+
+async def _warm_connection(pool: AsyncConnectionPool) -> None:
+    """Round-trip a pooled connection so the first requests don't pay for it."""
+    async with pool.connection() as conn:
+        await conn.execute("SELECT 1")
 
 
 async def close_db() -> None:
@@ -38,5 +61,4 @@ async def get_db() -> AsyncGenerator[psycopg.AsyncConnection, None]:
     if not _pool:
         raise RuntimeError("Database pool not initialized")
     async with _pool.connection() as conn:
-        await register_vector_async(conn)
         yield conn
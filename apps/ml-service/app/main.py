@@ -1,10 +1,14 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
 
 from .config import settings
-from .db import init_db, close_db
+from .db import init_db, close_db, get_db
+from .recommender.embeddings import refresh_embeddings_periodically
+from .recommender.vae import fit_vae_normalization
 from .routers import recommend, train
 
 
@@ -12,7 +16,17 @@ from .routers import recommend, train
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Startup and shutdown events."""
     await init_db()
+    async with get_db() as conn:
+        await fit_vae_normalization(conn)
+    # Embed new recipes in the background so startup isn't blocked; full
+    # recomputes run as a job (python -m app.recommender.embeddings --all)
+    refresher = asyncio.create_task(
+        refresh_embeddings_periodically(settings.EMBEDDING_REFRESH_INTERVAL_S)
+    )
     yield
+    refresher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await refresher
     await close_db()
 
 
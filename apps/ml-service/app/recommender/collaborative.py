@@ -1,10 +1,73 @@
 """Collaborative filtering using user-recipe interaction patterns."""
 
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from psycopg import AsyncConnection
 
 from ..config import settings
+from .profile import get_profile
+
+# User-user collaborative scoring, evaluated entirely in Postgres so only the
+# final top-N rows cross the wire:
+#   similarity(u)  = cosine(scores[u], scores[target]) over shared recipes
+#   score(recipe)  = SUM over neighbours u with similarity > 0 of
+#                    similarity(u) * scores[u, recipe]
+# Recipes the user already interacted with or asked to exclude are dropped
+# with an anti-join before aggregation.
+_COLLABORATIVE_QUERY = """
+    WITH target_recent AS (
+        SELECT recipe_id
+        FROM user_interactions
+        WHERE user_id = %(user_id)s
+        ORDER BY created_at DESC
+        LIMIT 200
+    ),
+    excluded AS (
+        SELECT recipe_id FROM target_recent
+        UNION
+        SELECT unnest(%(exclude_ids)s::uuid[])
+    ),
+    similar_users AS (
+        SELECT DISTINCT user_id
+        FROM user_interactions
+        WHERE recipe_id IN (SELECT recipe_id FROM target_recent)
+        AND user_id != %(user_id)s
+        LIMIT 50
+    ),
+    scores AS (
+        SELECT user_id, recipe_id, SUM(interaction_value) AS score
+        FROM user_interactions
+        WHERE user_id = %(user_id)s
+        OR user_id IN (SELECT user_id FROM similar_users)
+        GROUP BY user_id, recipe_id
+    ),
+    norms AS (
+        SELECT user_id, SQRT(SUM(score * score)) AS norm
+        FROM scores
+        GROUP BY user_id
+    ),
+    similarities AS (
+        SELECT s.user_id,
+               SUM(s.score * t.score) / NULLIF(n.norm * tn.norm, 0) AS similarity
+        FROM scores s
+        JOIN scores t ON t.recipe_id = s.recipe_id AND t.user_id = %(user_id)s
+        JOIN norms n ON n.user_id = s.user_id
+        JOIN norms tn ON tn.user_id = %(user_id)s
+        WHERE s.user_id != %(user_id)s
+        GROUP BY s.user_id, n.norm, tn.norm
+        HAVING SUM(s.score * t.score) > 0
+    )
+    SELECT s.recipe_id::text AS recipe_id, r.title,
+           SUM(sim.similarity * s.score) AS score
+    FROM scores s
+    JOIN similarities sim ON sim.user_id = s.user_id
+    JOIN recipes r ON r.id = s.recipe_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM excluded e WHERE e.recipe_id = s.recipe_id
+    )
+    GROUP BY s.recipe_id, r.title
+    HAVING SUM(sim.similarity * s.score) > 0
+    ORDER BY score DESC
+    LIMIT %(top_n)s
+"""
 
 
 async def get_collaborative_recommendations(
@@ -16,132 +79,34 @@ async def get_collaborative_recommendations(
     """
     Get recommendations based on similar users' interaction patterns.
 
-    Builds a sparse user-recipe interaction matrix, finds similar users
-    via cosine similarity, and aggregates their recipe scores.
+    Finds users who interacted with the same recipes, computes their
+    cosine similarity to the target user, and aggregates their recipe
+    scores weighted by similarity — all server-side in a single query.
     Returns empty list for cold-start users (< COLD_START_THRESHOLD interactions).
     """
-    # Check if user has enough interactions
-    result = await conn.execute(
-        """
-        SELECT interaction_count, cold_start
-        FROM user_taste_profiles
-        WHERE user_id = %s
-        """,
-        (user_id,),
-    )
-    profile = await result.fetchone()
-
-    if not profile or profile["cold_start"]:
+    profile = await get_profile(user_id)
+    if (
+        not profile
+        or profile["cold_start"]
+        or profile["interaction_count"] < settings.COLD_START_THRESHOLD
+    ):
         return []
 
-    if profile["interaction_count"] < settings.COLD_START_THRESHOLD:
-        return []
-
-    # Get this user's interactions
-    result = await conn.execute(
-        """
-        SELECT recipe_id, interaction_type, interaction_value
-        FROM user_interactions
-        WHERE user_id = %s
-        ORDER BY created_at DESC
-        LIMIT 200
-        """,
-        (user_id,),
-    )
-    user_interactions = await result.fetchall()
-
-    if not user_interactions:
-        return []
-
-    user_recipe_ids = {row["recipe_id"] for row in user_interactions}
-
-    # Find similar users (those who interacted with the same recipes)
     result = await conn.execute(
-        """
-        SELECT DISTINCT ui.user_id
-        FROM user_interactions ui
-        WHERE ui.recipe_id = ANY(%s)
-        AND ui.user_id != %s
-        LIMIT 50
-        """,
-        (list(user_recipe_ids), user_id),
-    )
-    similar_user_rows = await result.fetchall()
-    similar_user_ids = [row["user_id"] for row in similar_user_rows]
-
-    if not similar_user_ids:
-        return []
-
-    # Build interaction vectors for target user and similar users
-    all_user_ids = [user_id] + similar_user_ids
-
-    result = await conn.execute(
-        """
-        SELECT user_id, recipe_id, SUM(interaction_value) AS score
-        FROM user_interactions
-        WHERE user_id = ANY(%s)
-        GROUP BY user_id, recipe_id
-        """,
-        (all_user_ids,),
-    )
-    all_interactions = await result.fetchall()
-
-    # Build recipe index
-    recipe_ids = sorted({row["recipe_id"] for row in all_interactions})
-    recipe_idx = {rid: i for i, rid in enumerate(recipe_ids)}
-
-    # Build user-recipe matrix
-    user_idx = {uid: i for i, uid in enumerate(all_user_ids)}
-    matrix = np.zeros((len(all_user_ids), len(recipe_ids)))
-
-    for row in all_interactions:
-        uid_i = user_idx.get(row["user_id"])
-        rid_i = recipe_idx.get(row["recipe_id"])
-        if uid_i is not None and rid_i is not None:
-            matrix[uid_i, rid_i] = float(row["score"])
-
-    # Compute cosine similarity between target user and others
-    if matrix.shape[0] < 2:
-        return []
-
-    similarities = cosine_similarity(matrix[0:1], matrix[1:])[0]
-
-    # Weight other users' scores by similarity
-    weighted_scores = np.zeros(len(recipe_ids))
-    for i, sim in enumerate(similarities):
-        if sim > 0:
-            weighted_scores += sim * matrix[i + 1]
-
-    # Exclude recipes the user already interacted with
-    exclude_set = set(exclude_ids or []) | user_recipe_ids
-    for rid in exclude_set:
-        if rid in recipe_idx:
-            weighted_scores[recipe_idx[rid]] = 0
-
-    # Get top N recipe IDs
-    top_indices = np.argsort(weighted_scores)[::-1][:top_n * 2]
-    top_recipe_ids = [recipe_ids[i] for i in top_indices if weighted_scores[i] > 0][:top_n]
-
-    if not top_recipe_ids:
-        return []
-
-    # Fetch recipe titles
-    result = await conn.execute(
-        """
-        SELECT id AS recipe_id, title
-        FROM recipes
-        WHERE id = ANY(%s)
-        """,
-        (top_recipe_ids,),
+        _COLLABORATIVE_QUERY,
+        {
+            "user_id": user_id,
+            "exclude_ids": exclude_ids or [],
+            "top_n": top_n,
+        },
     )
-    titles = {row["recipe_id"]: row["title"] for row in await result.fetchall()}
 
     return [
         {
-            "recipe_id": rid,
-            "title": titles.get(rid, "Unknown"),
-            "score": float(weighted_scores[recipe_idx[rid]]),
+            "recipe_id": row["recipe_id"],
+            "title": row["title"] or "Unknown",
+            "score": float(row["score"]),
             "source": "collaborative",
         }
-        for rid in top_recipe_ids
+        for row in await result.fetchall()
     ]
@@ -3,7 +3,8 @@
 import numpy as np
 from psycopg import AsyncConnection
 
-from ..config import settings
+from .profile import get_profile
+from .ranking import widen_ef_search
 
 
 async def get_content_recommendations(
@@ -20,106 +21,65 @@ async def get_content_recommendations(
     preference vector.
     """
     # Get user taste profile
-    result = await conn.execute(
-        """
-        SELECT preference_vector, interaction_count
-        FROM user_taste_profiles
-        WHERE user_id = %s
-        """,
-        (user_id,),
-    )
-    profile = await result.fetchone()
+    profile = await get_profile(user_id)
 
     if not profile or profile["preference_vector"] is None:
         return []
 
-    preference_vector = np.array(profile["preference_vector"])
+    # Sent as a binary float32 vector parameter (pgvector's storage width)
+    preference_vector = np.asarray(profile["preference_vector"], dtype=np.float32)
 
-    # Build exclusion clause
-    exclude_clause = ""
-    params: list = [preference_vector.tolist(), top_n * 2]
-    if exclude_ids:
-        exclude_clause = "AND r.id != ALL(%s)"
-        params.insert(1, exclude_ids)
+    exclude_ids = exclude_ids or []
+    pool_size = top_n * 2
+    await widen_ef_search(conn, pool_size + len(exclude_ids))
 
-    # Query recipes by cosine similarity to preference vector
-    query = f"""
+    # Score ingredient and nutrition similarity in one statement. Candidates
+    # come from an ingredient-distance scan (index friendly), then get
+    # re-ranked by the blended score. The nutrition term only applies when
+    # the preference vector lives in the same space as nutrition_vector.
+    result = await conn.execute(
+        """
+        WITH excluded AS (
+            SELECT unnest(%(exclude_ids)s::uuid[]) AS id
+        ),
+        candidates AS (
+            SELECT r.id, r.title, r.ingredient_vector, r.nutrition_vector
+            FROM recipes r
+            WHERE r.ingredient_vector IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM excluded e WHERE e.id = r.id)
+            ORDER BY r.ingredient_vector <=> %(preference_vector)b ASC
+            LIMIT %(pool_size)s
+        )
         SELECT
-            r.id AS recipe_id,
-            r.title,
-            1 - (r.ingredient_vector <=> %s::vector) AS similarity_score
-        FROM recipes r
-        WHERE r.ingredient_vector IS NOT NULL
-        {exclude_clause}
-        ORDER BY r.ingredient_vector <=> %s::vector ASC
-        LIMIT %s
-    """
-
-    # Re-add vector for the ORDER BY clause
-    params.append(preference_vector.tolist())
-    params.append(top_n * 2)
-
-    result = await conn.execute(query, tuple(params))
-    rows = await result.fetchall()
-
-    # Also factor in nutrition vector similarity
-    nutrition_recs = await _get_nutrition_similarity(
-        conn, preference_vector, exclude_ids, top_n
+            c.id::text AS recipe_id,
+            c.title,
+            0.7 * (1 - (c.ingredient_vector <=> %(preference_vector)b))
+            + 0.3 * COALESCE(
+                CASE
+                    WHEN vector_dims(c.nutrition_vector)
+                        = vector_dims(%(preference_vector)b)
+                    THEN 1 - (c.nutrition_vector <=> %(preference_vector)b)
+                END,
+                0
+            ) AS score
+        FROM candidates c
+        ORDER BY score DESC
+        LIMIT %(top_n)s
+        """,
+        {
+            "preference_vector": preference_vector,
+            "exclude_ids": exclude_ids,
+            "pool_size": pool_size,
+            "top_n": top_n,
+        },
     )
 
-    # Blend ingredient and nutrition scores
-    recipe_scores: dict[str, dict] = {}
-    for row in rows:
-        recipe_scores[row["recipe_id"]] = {
+    return [
+        {
             "recipe_id": row["recipe_id"],
             "title": row["title"],
-            "score": float(row["similarity_score"]) * 0.7,
+            "score": float(row["score"]),
             "source": "content",
         }
-
-    for row in nutrition_recs:
-        rid = row["recipe_id"]
-        if rid in recipe_scores:
-            recipe_scores[rid]["score"] += float(row["similarity_score"]) * 0.3
-        else:
-            recipe_scores[rid] = {
-                "recipe_id": rid,
-                "title": row["title"],
-                "score": float(row["similarity_score"]) * 0.3,
-                "source": "content",
-            }
-
-    # Sort and return top N
-    sorted_recs = sorted(recipe_scores.values(), key=lambda x: x["score"], reverse=True)
-    return sorted_recs[:top_n]
-
-
-async def _get_nutrition_similarity(
-    conn: AsyncConnection,
-    preference_vector: np.ndarray,
-    exclude_ids: list[str] | None,
-    top_n: int,
-) -> list[dict]:
-    """Get recipes similar by nutrition vector."""
-    exclude_clause = ""
-    params: list = [preference_vector.tolist(), top_n]
-    if exclude_ids:
-        exclude_clause = "AND r.id != ALL(%s)"
-        params.insert(1, exclude_ids)
-
-    query = f"""
-        SELECT
-            r.id AS recipe_id,
-            r.title,
-            1 - (r.nutrition_vector <=> %s::vector) AS similarity_score
-        FROM recipes r
-        WHERE r.nutrition_vector IS NOT NULL
-        {exclude_clause}
-        ORDER BY r.nutrition_vector <=> %s::vector ASC
-        LIMIT %s
-    """
-    params.append(preference_vector.tolist())
-    params.append(top_n)
-
-    result = await conn.execute(query, tuple(params))
-    return await result.fetchall()
+        for row in await result.fetchall()
+    ]
@@ -0,0 +1,157 @@
+"""Precomputed VAE and RNN recipe embeddings stored on the recipes table.
+
+The VAE and RNN recommenders rank recipes by cosine similarity in their
+own 32-dimensional spaces. Storing each recipe's embedding in
+recipes.vae_embedding / recipes.rnn_embedding lets pgvector's HNSW index
+do that ranking instead of re-encoding candidates on every request.
+Stored VAE embeddings are only ranked against when trained weights (with
+their fixed normalization stats) are loaded; a randomly initialized VAE
+fits its normalization per process, so its stored vectors aren't
+comparable across workers and get_vae_recommendations scores in-process.
+
+While serving, each worker runs refresh_embeddings_periodically() in the
+background to embed newly cached recipes. Recomputing every row (needed
+after the VAE weights change) is an explicit job:
+
+    python -m app.recommender.embeddings --all
+"""
+
+import argparse
+import asyncio
+import logging
+
+import numpy as np
+import psycopg
+from psycopg import AsyncConnection
+
+from ..db import close_db, get_db, init_db
+from .rnn import MealSequenceRNN, _fill_recipe_embedding
+from .vae import RecipeVAE, fit_vae_normalization, get_vae
+
+logger = logging.getLogger(__name__)
+
+
+def _nonzero_or_none(embedding: np.ndarray) -> np.ndarray | None:
+    """
+    NULL out zero vectors before storing them.
+
+    Cosine distance to a zero vector is NaN, and NaN scores would flatten
+    the hybrid's min-max normalization, so such recipes (e.g. no
+    ingredient vector and no macros) simply get no stored embedding.
+    """
+    return embedding if np.any(embedding) else None
+
+
+async def refresh_recipe_embeddings(
+    conn: AsyncConnection,
+    only_missing: bool = True,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Compute and store VAE and RNN embeddings for recipes.
+
+    With only_missing, just fills recipes whose embeddings are NULL
+    (e.g. newly cached ones); otherwise recomputes every row, which is
+    needed whenever the VAE weights or normalization change. Each batch
+    is locked with SKIP LOCKED and committed on its own, so concurrent
+    workers split the rows instead of rewriting each other's. Returns
+    the number of recipes updated.
+    """
+    vae = get_vae()
+    missing_clause = "AND vae_embedding IS NULL" if only_missing else ""
+    last_id = None
+    updated = 0
+
+    while True:
+        # Keyset pagination keeps each batch an index range scan
+        result = await conn.execute(
+            f"""
+            SELECT id, calories, protein_g, carbs_g, fat_g, sodium_mg,
+                   fiber_g, sugar_g, ready_in_minutes, servings,
+                   diet_labels, ingredient_vector
+            FROM recipes
+            WHERE (%(last_id)s::uuid IS NULL OR id > %(last_id)s::uuid)
+            {missing_clause}
+            ORDER BY id
+            LIMIT %(batch_size)s
+            FOR UPDATE SKIP LOCKED
+            """,
+            {"last_id": last_id, "batch_size": batch_size},
+        )
+        if not result.rowcount:
+            await conn.commit()
+            return updated
+
+        features = np.empty((result.rowcount, RecipeVAE.FEATURE_DIM), dtype=np.float32)
+        rnn_embeddings = np.zeros(
+            (result.rowcount, MealSequenceRNN.OUTPUT_DIM), dtype=np.float32
+        )
+        ids = []
+        async for recipe in result:
+            features[len(ids)] = vae.feature_row(recipe)
+            _fill_recipe_embedding(rnn_embeddings[len(ids)], recipe)
+            ids.append(recipe["id"])
+        vae_embeddings = vae.encode_batch(features)
+
+        async with conn.cursor() as cur:
+            await cur.executemany(
+                """
+                UPDATE recipes
+                SET vae_embedding = %b, rnn_embedding = %b
+                WHERE id = %s
+                """,
+                [
+                    (_nonzero_or_none(v), _nonzero_or_none(r), recipe_id)
+                    for v, r, recipe_id in zip(vae_embeddings, rnn_embeddings, ids)
+                ],
+            )
+        await conn.commit()
+
+        updated += len(ids)
+        last_id = ids[-1]
+
+
+async def refresh_embeddings_periodically(interval_s: float) -> None:
+    """
+    Embed recipes with missing embeddings every interval_s seconds.
+
+    Runs until cancelled. Stops early if the embedding columns don't
+    exist (migration not applied), since the recommenders then score
+    in-process anyway.
+    """
+    while True:
+        try:
+            async with get_db() as conn:
+                updated = await refresh_recipe_embeddings(conn, only_missing=True)
+        except psycopg.errors.UndefinedColumn:
+            logger.warning("recipes embedding columns are missing; not refreshing")
+            return
+        except Exception:
+            logger.exception("Recipe embedding refresh failed")
+        else:
+            if updated:
+                logger.info("Stored embeddings for %d new recipes", updated)
+        await asyncio.sleep(interval_s)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Compute stored recipe embeddings.")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="recompute every recipe, not only missing ones (after VAE weights change)",
+    )
+    args = parser.parse_args()
+
+    await init_db()
+    try:
+        async with get_db() as conn:
+            await fit_vae_normalization(conn)
+            updated = await refresh_recipe_embeddings(conn, only_missing=not args.all)
+    finally:
+        await close_db()
+    print(f"Updated embeddings for {updated} recipes")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -10,17 +10,39 @@ Combines five recommendation approaches:
 The final score is a weighted blend that adapts based on user profile maturity.
 """
 
+import asyncio
+import logging
+
 import numpy as np
+import psycopg
 from psycopg import AsyncConnection
+from psycopg.types.json import Jsonb
+from psycopg_pool import PoolTimeout
 
 from ..config import settings
+from ..db import get_db
 from ..models.schemas import RecipeScore, RecommendResponse, TrainResponse
 from .content_based import get_content_recommendations
 from .collaborative import get_collaborative_recommendations
+from .profile import get_profile, invalidate_profile
+from .ranking import top_n_indices
 from .knowledge_based import get_knowledge_based_recommendations
 from .vae import get_vae_recommendations
 from .rnn import get_rnn_recommendations
 
+logger = logging.getLogger(__name__)
+
+# Most-interacted recipes, for users with no personalized results
+_POPULAR_QUERY = """
+    SELECT r.id::text AS recipe_id, r.title, COUNT(ui.id) AS popularity
+    FROM recipes r
+    LEFT JOIN user_interactions ui ON ui.recipe_id = r.id
+    WHERE r.id != ALL(%(exclude_ids)s::uuid[])
+    GROUP BY r.id, r.title
+    ORDER BY popularity DESC
+    LIMIT %(limit)s
+"""
+
 # Interaction type weights for preference vector training
 INTERACTION_WEIGHTS = {
     "cook": 5.0,
@@ -66,7 +88,6 @@ def _get_maturity_stage(interaction_count: int, is_cold_start: bool) -> str:
 
 
 async def get_hybrid_recommendations(
-    conn: AsyncConnection,
     user_id: str,
     top_n: int = 10,
     exclude_ids: list[str] | None = None,
@@ -74,20 +95,17 @@ async def get_hybrid_recommendations(
     """
     Get hybrid recommendations by blending all model scores.
 
-    Fetches candidates from each recommender in parallel-style,
+    Fetches candidates from each recommender concurrently,
     combines scores using maturity-adapted weights,
     deduplicates, and returns top N.
+
+    No connection is held across the fan-out: each recommender (and the
+    popular fallback) checks one out of the pool only for its own
+    queries. Raises PoolTimeout if the pool is exhausted, rather than
+    quietly degrading to popular recipes.
     """
     # Get user profile
-    result = await conn.execute(
-        """
-        SELECT content_weight, collab_weight, cold_start, interaction_count
-        FROM user_taste_profiles
-        WHERE user_id = %s
-        """,
-        (user_id,),
-    )
-    profile = await result.fetchone()
+    profile = await get_profile(user_id)
 
     is_cold_start = True
     interaction_count = 0
@@ -99,86 +117,110 @@ async def get_hybrid_recommendations(
     maturity = _get_maturity_stage(interaction_count, is_cold_start)
     weights = MODEL_WEIGHTS[maturity]
 
-    # Gather recommendations from all models
-    all_recs: dict[str, list[dict]] = {}
-
-    # Content-based (always available if user has a taste profile)
-    all_recs["content"] = await get_content_recommendations(
-        conn, user_id, top_n * 2, exclude_ids
-    )
-
-    # Knowledge-based (always available — uses dietary guidelines)
-    all_recs["knowledge"] = await get_knowledge_based_recommendations(
-        conn, user_id, top_n * 2, exclude_ids
-    )
-
+    # Gather recommendations from all models concurrently. Each recommender
+    # runs on its own pooled connection so their queries overlap instead of
+    # serializing on the request connection.
+    recommenders = {
+        "content": get_content_recommendations,
+        "knowledge": get_knowledge_based_recommendations,
+        "vae": get_vae_recommendations,
+        "rnn": get_rnn_recommendations,
+    }
     # Collaborative (only for non-cold-start users)
     if maturity != "cold_start":
-        all_recs["collaborative"] = await get_collaborative_recommendations(
-            conn, user_id, top_n * 2, exclude_ids
-        )
-    else:
-        all_recs["collaborative"] = []
+        recommenders["collaborative"] = get_collaborative_recommendations
 
-    # VAE (works even with limited data)
-    all_recs["vae"] = await get_vae_recommendations(
-        conn, user_id, top_n * 2, exclude_ids
+    results = await asyncio.gather(
+        *(
+            _run_recommender(recommender, user_id, top_n * 2, exclude_ids)
+            for recommender in recommenders.values()
+        ),
+        return_exceptions=True,
     )
 
-    # RNN (needs meal history)
-    all_recs["rnn"] = await get_rnn_recommendations(
-        conn, user_id, top_n * 2, exclude_ids
-    )
+    for result in results:
+        if isinstance(result, PoolTimeout):
+            # Overload, not a model failure: surface it to the caller
+            raise result
+
+    all_recs: dict[str, list[dict]] = {"collaborative": []}
+    for model_name, result in zip(recommenders, results):
+        if isinstance(result, BaseException):
+            # A failing model shouldn't take down the whole blend
+            logger.warning(
+                "%s recommender failed for user %s", model_name, user_id,
+                exc_info=result,
+            )
+            all_recs[model_name] = []
+        else:
+            all_recs[model_name] = result
 
     # Check if we have any recommendations at all
     total_recs = sum(len(v) for v in all_recs.values())
     if total_recs == 0:
-        return await _fallback_popular(conn, user_id, top_n, exclude_ids)
-
-    # Normalize scores within each model to [0, 1]
-    for model_name, recs in all_recs.items():
-        if not recs:
-            continue
-        max_score = max(r["score"] for r in recs) or 1.0
-        min_score = min(r["score"] for r in recs)
-        score_range = max_score - min_score
-        if score_range > 0:
-            for r in recs:
-                r["score"] = (r["score"] - min_score) / score_range
-        else:
-            for r in recs:
-                r["score"] = 1.0
-
-    # Merge scores with weighted blending
-    combined: dict[str, dict] = {}
+        async with get_db() as conn:
+            return await _fallback_popular(conn, user_id, top_n, exclude_ids)
+
+    # Only models with a positive blend weight contribute candidates
+    blended = {
+        model_name: (weights[model_name], recs)
+        for model_name, recs in all_recs.items()
+        if recs and weights.get(model_name, 0.0) > 0
+    }
+
+    # Index every candidate once so each model's contribution accumulates
+    # into a flat score array instead of per-recipe dicts.
+    recipe_idx: dict[str, int] = {}
+    titles: list[str] = []
+    for _, recs in blended.values():
+        for rec in recs:
+            if rec["recipe_id"] not in recipe_idx:
+                recipe_idx[rec["recipe_id"]] = len(titles)
+                titles.append(rec["title"])
+    ids = list(recipe_idx)
+    combined = np.zeros(len(ids))
+
+    for model_weight, recs in blended.values():
+        # Normalize scores within each model to [0, 1]
+        scores = _minmax_normalize(
+            np.fromiter((r["score"] for r in recs), dtype=np.float64, count=len(recs))
+        )
 
-    for model_name, recs in all_recs.items():
-        model_weight = weights.get(model_name, 0.0)
-        if model_weight <= 0:
-            continue
+        # Weighted blend; add.at so repeated ids within a model accumulate
+        idx = np.fromiter(
+            (recipe_idx[r["recipe_id"]] for r in recs), dtype=np.intp, count=len(recs)
+        )
+        np.add.at(combined, idx, model_weight * scores)
 
-        for rec in recs:
-            rid = rec["recipe_id"]
-            if rid in combined:
-                combined[rid]["score"] += model_weight * rec["score"]
-            else:
-                combined[rid] = {
-                    "recipe_id": rid,
-                    "title": rec["title"],
-                    "score": model_weight * rec["score"],
-                    "source": "hybrid",
-                }
-
-    # Sort and take top N
-    sorted_recs = sorted(combined.values(), key=lambda x: x["score"], reverse=True)[:top_n]
+    # Take top N, sorting only the selected candidates
+    top = top_n_indices(combined, top_n)
 
     return RecommendResponse(
         user_id=user_id,
-        recommendations=[RecipeScore(**r) for r in sorted_recs],
+        recommendations=[
+            RecipeScore(
+                recipe_id=ids[i],
+                title=titles[i],
+                score=float(combined[i]),
+                source="hybrid",
+            )
+            for i in top.tolist()
+        ],
         is_cold_start=is_cold_start,
     )
 
 
+async def _run_recommender(
+    recommender,
+    user_id: str,
+    top_n: int,
+    exclude_ids: list[str] | None,
+) -> list[dict]:
+    """Run a single recommender on a dedicated connection from the pool."""
+    async with get_db() as conn:
+        return await recommender(conn, user_id, top_n, exclude_ids)
+
+
 async def _fallback_popular(
     conn: AsyncConnection,
     user_id: str,
@@ -186,23 +228,9 @@ async def _fallback_popular(
     exclude_ids: list[str] | None,
 ) -> RecommendResponse:
     """Fall back to popular recipes when no personalized recommendations available."""
-    exclude_clause = ""
-    params: list = [top_n]
-    if exclude_ids:
-        exclude_clause = "WHERE r.id != ALL(%s)"
-        params.insert(0, exclude_ids)
-
     result = await conn.execute(
-        f"""
-        SELECT r.id AS recipe_id, r.title, COUNT(ui.id) AS popularity
-        FROM recipes r
-        LEFT JOIN user_interactions ui ON ui.recipe_id = r.id
-        {exclude_clause}
-        GROUP BY r.id, r.title
-        ORDER BY popularity DESC
-        LIMIT %s
-        """,
-        tuple(params),
+        _POPULAR_QUERY,
+        {"exclude_ids": exclude_ids or [], "limit": top_n},
     )
     rows = await result.fetchall()
 
@@ -233,23 +261,17 @@ async def retrain_user_model(
     Rebuilds the preference vector from weighted interactions and
     updates user_taste_profiles.
     """
-    # Get user interactions
-    result = await conn.execute(
-        """
-        SELECT ui.recipe_id, ui.interaction_type, ui.interaction_value,
-               r.ingredient_vector, r.nutrition_vector
-        FROM user_interactions ui
-        JOIN recipes r ON r.id = ui.recipe_id
-        WHERE ui.user_id = %s
-        AND r.ingredient_vector IS NOT NULL
-        ORDER BY ui.created_at DESC
-        LIMIT 500
-        """,
-        (user_id,),
-    )
-    interactions = await result.fetchall()
+    try:
+        interaction_count, preference_vector = await _preference_vector_from_db(
+            conn, user_id
+        )
+    except psycopg.errors.UndefinedFunction:
+        # pgvector < 0.7 has no l2_normalize / vector arithmetic
+        await conn.rollback()
+        interaction_count, preference_vector = await _preference_vector_in_python(
+            conn, user_id
+        )
 
-    interaction_count = len(interactions)
     is_cold_start = interaction_count < settings.COLD_START_THRESHOLD
 
     if interaction_count == 0:
@@ -266,6 +288,7 @@ async def retrain_user_model(
             (user_id,),
         )
         await conn.commit()
+        await invalidate_profile(user_id)
         return TrainResponse(
             user_id=user_id,
             interaction_count=0,
@@ -273,26 +296,7 @@ async def retrain_user_model(
             message="No interactions found. Profile initialized as cold start.",
         )
 
-    # Compute weighted preference vector
-    vectors = []
-    weights = []
-
-    for interaction in interactions:
-        vec = interaction.get("ingredient_vector")
-        if vec is None:
-            continue
-
-        itype = interaction["interaction_type"]
-        ivalue = float(interaction["interaction_value"] or 0)
-
-        weight = INTERACTION_WEIGHTS.get(itype, 1.0)
-        if itype == "rate":
-            weight *= ivalue
-
-        vectors.append(np.array(vec))
-        weights.append(weight)
-
-    if not vectors:
+    if preference_vector is None:
         return TrainResponse(
             user_id=user_id,
             interaction_count=interaction_count,
@@ -300,53 +304,36 @@ async def retrain_user_model(
             message="No recipe vectors available for training.",
         )
 
-    # Weighted average of recipe vectors
-    vectors_arr = np.array(vectors)
-    weights_arr = np.array(weights).reshape(-1, 1)
-
-    # Normalize weights to avoid negative total
-    weights_arr = np.clip(weights_arr, -10, 10)
-    total_weight = np.abs(weights_arr).sum()
-    if total_weight == 0:
-        total_weight = 1.0
-
-    preference_vector = (vectors_arr * weights_arr).sum(axis=0) / total_weight
-
-    # Normalize to unit vector
-    norm = np.linalg.norm(preference_vector)
-    if norm > 0:
-        preference_vector = preference_vector / norm
-
     # Determine blend weights based on maturity
     maturity = _get_maturity_stage(interaction_count, is_cold_start)
     model_weights = MODEL_WEIGHTS[maturity]
     content_weight = model_weights["content"]
     collab_weight = model_weights["collaborative"]
 
-    # Update profile
+    # Update profile (vector sent in pgvector's binary float32 format)
+    preference_vector = preference_vector.astype(np.float32, copy=False)
     await conn.execute(
         """
         INSERT INTO user_taste_profiles (
             user_id, preference_vector, interaction_count,
             cold_start, content_weight, collab_weight, last_trained_at
         )
-        VALUES (%s, %s::vector, %s, %s, %s, %s, NOW())
+        VALUES (%s, %b, %s, %s, %s, %s, NOW())
         ON CONFLICT (user_id) DO UPDATE SET
-            preference_vector = %s::vector,
-            interaction_count = %s,
-            cold_start = %s,
-            content_weight = %s,
-            collab_weight = %s,
-            last_trained_at = NOW()
+            preference_vector = EXCLUDED.preference_vector,
+            interaction_count = EXCLUDED.interaction_count,
+            cold_start = EXCLUDED.cold_start,
+            content_weight = EXCLUDED.content_weight,
+            collab_weight = EXCLUDED.collab_weight,
+            last_trained_at = EXCLUDED.last_trained_at
         """,
         (
-            user_id, preference_vector.tolist(), interaction_count,
-            is_cold_start, content_weight, collab_weight,
-            preference_vector.tolist(), interaction_count,
+            user_id, preference_vector, interaction_count,
             is_cold_start, content_weight, collab_weight,
         ),
     )
     await conn.commit()
+    await invalidate_profile(user_id)
 
     return TrainResponse(
         user_id=user_id,
@@ -354,3 +341,128 @@ async def retrain_user_model(
         is_cold_start=is_cold_start,
         message=f"Model retrained with {interaction_count} interactions. Maturity: {maturity}.",
     )
+
+
+async def _preference_vector_from_db(
+    conn: AsyncConnection,
+    user_id: str,
+) -> tuple[int, np.ndarray | None]:
+    """
+    Compute the unit-length weighted centroid of recent recipe vectors in Postgres.
+
+    Mirrors _preference_vector_in_python: weights come from
+    INTERACTION_WEIGHTS (scaled by the rating for "rate"), clipped to
+    [-10, 10]. Dividing by the total weight is skipped since the result
+    is L2-normalized anyway.
+    """
+    result = await conn.execute(
+        """
+        WITH recent AS (
+            SELECT r.ingredient_vector,
+                   LEAST(GREATEST(
+                       COALESCE((%(weights)s::jsonb ->> ui.interaction_type)::float8, 1.0)
+                       * CASE
+                           WHEN ui.interaction_type = 'rate'
+                           THEN COALESCE(ui.interaction_value, 0)
+                           ELSE 1.0
+                         END,
+                       -10), 10) AS weight
+            FROM user_interactions ui
+            JOIN recipes r ON r.id = ui.recipe_id
+            WHERE ui.user_id = %(user_id)s
+            AND r.ingredient_vector IS NOT NULL
+            ORDER BY ui.created_at DESC
+            LIMIT 500
+        )
+        SELECT
+            COUNT(*) AS interaction_count,
+            l2_normalize(SUM(
+                array_fill(weight, ARRAY[vector_dims(ingredient_vector)])::vector
+                * ingredient_vector
+            )) AS preference_vector
+        FROM recent
+        """,
+        {"user_id": user_id, "weights": Jsonb(INTERACTION_WEIGHTS)},
+    )
+    row = await result.fetchone()
+    return row["interaction_count"], row["preference_vector"]
+
+
+async def _preference_vector_in_python(
+    conn: AsyncConnection,
+    user_id: str,
+) -> tuple[int, np.ndarray | None]:
+    """Fallback for _preference_vector_from_db computing the centroid in NumPy."""
+    result = await conn.execute(
+        """
+        SELECT ui.interaction_type, ui.interaction_value, r.ingredient_vector
+        FROM user_interactions ui
+        JOIN recipes r ON r.id = ui.recipe_id
+        WHERE ui.user_id = %s
+        AND r.ingredient_vector IS NOT NULL
+        ORDER BY ui.created_at DESC
+        LIMIT 500
+        """,
+        (user_id,),
+    )
+    interactions = await result.fetchall()
+
+    interaction_count = len(interactions)
+    if interaction_count == 0:
+        return 0, None
+
+    # Compute weighted preference vector, filling preallocated float32
+    # buffers (the pgvector storage width) in a single pass
+    dim = len(interactions[0]["ingredient_vector"])
+    vectors = np.empty((interaction_count, dim), dtype=np.float32)
+    weights = np.empty(interaction_count, dtype=np.float32)
+    n_vectors = 0
+
+    for interaction in interactions:
+        vec = interaction.get("ingredient_vector")
+        if vec is None:
+            continue
+
+        itype = interaction["interaction_type"]
+        ivalue = float(interaction["interaction_value"] or 0)
+
+        weight = INTERACTION_WEIGHTS.get(itype, 1.0)
+        if itype == "rate":
+            weight *= ivalue
+
+        vectors[n_vectors] = vec
+        weights[n_vectors] = weight
+        n_vectors += 1
+
+    if n_vectors == 0:
+        return interaction_count, None
+
+    return interaction_count, _weighted_centroid(
+        vectors[:n_vectors], weights[:n_vectors]
+    )
+
+
+def _weighted_centroid(vectors: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Unit-length weighted centroid of the rows of vectors.
+
+    Weights are clipped to [-10, 10] in place. Dividing by the total
+    weight is skipped since it can't change the direction of the result.
+    """
+    np.clip(weights, -10, 10, out=weights)
+    centroid = np.einsum("i,ij->j", weights, vectors)
+    norm = np.linalg.norm(centroid)
+    if norm > 0:
+        centroid /= norm
+    return centroid
+
+
+def _minmax_normalize(scores: np.ndarray) -> np.ndarray:
+    """Rescale scores to [0, 1] in place; all-equal scores become 1."""
+    lo, hi = scores.min(), scores.max()
+    if hi > lo:
+        scores -= lo
+        scores /= hi - lo
+    else:
+        scores.fill(1.0)
+    return scores
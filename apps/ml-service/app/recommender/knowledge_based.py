@@ -7,9 +7,11 @@ Critical for health-related recommendations where safety and efficacy
 are paramount.
 """
 
+import numpy as np
 from psycopg import AsyncConnection
 
 from ..config import settings
+from .ranking import top_n_indices
 
 # Expert-validated dietary guidelines (based on USDA/WHO standards)
 DAILY_REFERENCE_INTAKES = {
@@ -61,6 +63,89 @@ DIET_CONSTRAINTS: dict[str, dict] = {
     },
 }
 
+# Lowercased constraint sets per diet, built once so scoring doesn't
+# re-normalize them for every recipe
+_DIET_EXCLUDED_ALLERGENS: dict[str, frozenset[str]] = {
+    diet: frozenset(a.lower() for a in constraints["excluded_allergens"])
+    for diet, constraints in DIET_CONSTRAINTS.items()
+}
+_DIET_PREFERRED_LABELS: dict[str, frozenset[str]] = {
+    diet: frozenset(l.lower() for l in constraints["preferred_labels"])
+    for diet, constraints in DIET_CONSTRAINTS.items()
+}
+
+# The same sets flattened into parallel (diet, value) arrays, so the
+# candidate query can resolve the user's diet constraints in SQL
+_DIET_QUERY_PARAMS = {
+    "allergen_diets": [d for d, vals in _DIET_EXCLUDED_ALLERGENS.items() for _ in vals],
+    "diet_allergens": [v for vals in _DIET_EXCLUDED_ALLERGENS.values() for v in vals],
+    "label_diets": [d for d, vals in _DIET_PREFERRED_LABELS.items() for _ in vals],
+    "diet_labels": [v for vals in _DIET_PREFERRED_LABELS.values() for v in vals],
+}
+
+# Knowledge-based candidates: the newest safe recipes, plus the newest safe
+# recipes carrying one of the user's preferred diet labels (served by the
+# diet_labels GIN index), so diet-matching recipes aren't crowded out by
+# recency. Labels match exactly, as in the scorer. "Safe" drops recipes
+# containing, case-insensitively, any of the user's allergens or an
+# allergen their diet excludes; both score zero anyway, so the LIMITs
+# count only usable candidates.
+_CANDIDATES_QUERY = """
+    WITH user_diet AS (
+        SELECT diet_type
+        FROM dietary_preferences
+        WHERE user_id = %(user_id)s
+    ),
+    blocked AS (
+        SELECT lower(allergen_type) AS allergen
+        FROM user_allergens
+        WHERE user_id = %(user_id)s
+        UNION
+        SELECT d.allergen
+        FROM unnest(%(allergen_diets)s::text[], %(diet_allergens)s::text[])
+            AS d(diet_type, allergen)
+        JOIN user_diet USING (diet_type)
+    ),
+    preferred AS (
+        SELECT coalesce(array_agg(d.label), '{}') AS labels
+        FROM unnest(%(label_diets)s::text[], %(diet_labels)s::text[])
+            AS d(diet_type, label)
+        JOIN user_diet USING (diet_type)
+    ),
+    safe AS NOT MATERIALIZED (
+        SELECT r.id::text AS recipe_id, r.title, r.calories, r.protein_g,
+               r.carbs_g, r.fat_g, r.fiber_g, r.allergens, r.diet_labels,
+               r.cached_at
+        FROM recipes r
+        WHERE r.id != ALL(%(exclude_ids)s::uuid[])
+        AND NOT EXISTS (
+            SELECT 1
+            FROM unnest(r.allergens) AS a(allergen)
+            JOIN blocked b ON b.allergen = lower(a.allergen)
+        )
+    ),
+    candidates AS (
+        (
+            SELECT s.*
+            FROM safe s, preferred p
+            WHERE s.diet_labels && p.labels
+            ORDER BY s.cached_at DESC
+            LIMIT %(limit)s
+        )
+        UNION
+        (
+            SELECT s.*
+            FROM safe s
+            ORDER BY s.cached_at DESC
+            LIMIT %(limit)s
+        )
+    )
+    SELECT recipe_id, title, calories, protein_g, carbs_g, fat_g, fiber_g,
+           allergens, diet_labels
+    FROM candidates
+    ORDER BY cached_at DESC, recipe_id
+"""
+
 
 class NutritionScore:
     """Scores a recipe based on nutritional guidelines and user goals."""
@@ -79,6 +164,8 @@ class NutritionScore:
         self.fat_target = fat_target or DAILY_REFERENCE_INTAKES["fat_g"]["default"]
         self.diet_type = diet_type
         self.constraints = DIET_CONSTRAINTS.get(diet_type or "", {})
+        self._excluded_allergens = _DIET_EXCLUDED_ALLERGENS.get(diet_type or "", frozenset())
+        self._preferred_labels = _DIET_PREFERRED_LABELS.get(diet_type or "", frozenset())
 
     def score_recipe(
         self,
@@ -127,6 +214,81 @@ class NutritionScore:
         weighted_sum = sum(s * w for _, s, w in scores)
         return weighted_sum / total_weight if total_weight > 0 else 0.5
 
+    def score_recipes_batch(
+        self,
+        recipes: list[dict],
+        meal_type: str = "lunch",
+    ) -> np.ndarray:
+        """
+        Score many recipes at once; equivalent to score_recipe per row.
+
+        The numeric factors are computed column-wise over an (N, 5)
+        matrix of calories, protein, carbs, fat and fiber. Only diet
+        compatibility, a set check, stays per recipe.
+        """
+        if not recipes:
+            return np.empty(0)
+
+        F = np.array(
+            [
+                (
+                    r.get("calories") or 0,
+                    r.get("protein_g") or 0,
+                    r.get("carbs_g") or 0,
+                    r.get("fat_g") or 0,
+                    r.get("fiber_g") or 0,
+                )
+                for r in recipes
+            ],
+            dtype=np.float64,
+        )
+        calories, protein, carbs, fat, fiber = F.T
+
+        meal_ratio = MEAL_DISTRIBUTION.get(meal_type, {"ratio": 0.3})["ratio"]
+        target_calories = self.calorie_target * meal_ratio
+
+        # 1. Calorie appropriateness, only counted where it can be computed
+        has_cal = (calories > 0) & (target_calories > 0)
+        cal_score = np.zeros(len(recipes))
+        if target_calories > 0:
+            cal_score = np.maximum(0, 1.0 - np.abs(1.0 - calories / target_calories) * 0.5)
+
+        # 2. Macro balance over the macros with a positive target
+        macro_terms = [
+            np.maximum(0, 1.0 - np.abs(1.0 - actual / (target * meal_ratio)) * 0.5)
+            for actual, target in [
+                (protein, self.protein_target),
+                (carbs, self.carb_target),
+                (fat, self.fat_target),
+            ]
+            if target * meal_ratio > 0
+        ]
+        macro_score = np.mean(macro_terms, axis=0) if macro_terms else np.full(len(recipes), 0.5)
+
+        # 3. Diet compatibility, uniformly 1.0 without a diet type
+        if self.diet_type:
+            diet_score = np.fromiter(
+                (self._score_diet_compatibility(r) for r in recipes),
+                dtype=np.float64,
+                count=len(recipes),
+            )
+        else:
+            diet_score = np.ones(len(recipes))
+
+        # 4. Nutritional density, neutral for recipes without calories
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fiber_score = np.minimum(1.0, fiber / calories * 100 / 3.0)
+            protein_score = np.minimum(1.0, protein / calories * 100 / 8.0)
+        density_score = np.where(calories > 0, (fiber_score + protein_score) / 2, 0.5)
+
+        weighted_sum = (
+            np.where(has_cal, cal_score * 0.3, 0.0)
+            + macro_score * 0.25
+            + diet_score * 0.25
+            + density_score * 0.2
+        )
+        return weighted_sum / np.where(has_cal, 1.0, 0.7)
+
     def _score_macros(self, recipe: dict, meal_ratio: float) -> float:
         """Score macro nutrient balance."""
         protein = recipe.get("protein_g") or 0
@@ -154,19 +316,18 @@ class NutritionScore:
         if not self.diet_type:
             return 1.0
 
-        recipe_allergens = set(a.lower() for a in (recipe.get("allergens") or []))
-        recipe_labels = set(l.lower() for l in (recipe.get("diet_labels") or []))
-
-        # Check excluded allergens
-        excluded = set(a.lower() for a in self.constraints.get("excluded_allergens", []))
-        if recipe_allergens & excluded:
+        # Check excluded allergens (most diets have none to check)
+        if self._excluded_allergens and not self._excluded_allergens.isdisjoint(
+            a.lower() for a in (recipe.get("allergens") or ())
+        ):
             return 0.0  # Hard disqualification
 
-        # Check preferred labels
-        preferred = set(l.lower() for l in self.constraints.get("preferred_labels", []))
-        if preferred and recipe_labels & preferred:
-            return 1.0
-        elif preferred:
+        # Check preferred labels. Matched exactly, like the candidate
+        # query's diet_labels && overlap (and its GIN index); stored labels
+        # are Spoonacular's, which are lowercase.
+        if self._preferred_labels:
+            if not self._preferred_labels.isdisjoint(recipe.get("diet_labels") or ()):
+                return 1.0
             return 0.3  # Not labeled but not necessarily incompatible
 
         return 0.8
@@ -204,17 +365,30 @@ async def get_knowledge_based_recommendations(
     Fetches user dietary preferences, applies expert nutritional rules,
     and scores recipes based on alignment with health goals.
     """
-    # Get user dietary preferences
-    result = await conn.execute(
-        """
-        SELECT calorie_target, protein_target_g, carb_target_g,
-               fat_target_g, diet_type
-        FROM dietary_preferences
-        WHERE user_id = %s
-        """,
-        (user_id,),
-    )
-    prefs = await result.fetchone()
+    # The preferences and candidate queries are independent (the candidate
+    # query resolves the diet itself), so send both in one pipeline: a
+    # single round-trip instead of two.
+    async with conn.pipeline():
+        prefs_result = await conn.execute(
+            """
+            SELECT calorie_target, protein_target_g, carb_target_g,
+                   fat_target_g, diet_type
+            FROM dietary_preferences
+            WHERE user_id = %s
+            """,
+            (user_id,),
+        )
+        candidates_result = await conn.execute(
+            _CANDIDATES_QUERY,
+            {
+                "user_id": user_id,
+                "exclude_ids": exclude_ids or [],
+                "limit": top_n * 5,
+                **_DIET_QUERY_PARAMS,
+            },
+        )
+        prefs = await prefs_result.fetchone()
+        candidates = await candidates_result.fetchall()
 
     scorer = NutritionScore(
         calorie_target=float(prefs["calorie_target"]) if prefs and prefs["calorie_target"] else 2000,
@@ -224,51 +398,15 @@ async def get_knowledge_based_recommendations(
         diet_type=prefs["diet_type"] if prefs else None,
     )
 
-    # Get user allergens for safety filtering
-    result = await conn.execute(
-        """
-        SELECT allergen_type FROM user_allergens WHERE user_id = %s
-        """,
-        (user_id,),
-    )
-    user_allergens = {row["allergen_type"].lower() for row in await result.fetchall()}
-
-    # Fetch candidate recipes
-    exclude_clause = ""
-    params: list = [top_n * 5]
-    if exclude_ids:
-        exclude_clause = "WHERE id != ALL(%s)"
-        params.insert(0, exclude_ids)
-
-    result = await conn.execute(
-        f"""
-        SELECT id AS recipe_id, title, calories, protein_g, carbs_g, fat_g,
-               sodium_mg, fiber_g, sugar_g, allergens, diet_labels
-        FROM recipes
-        {exclude_clause}
-        ORDER BY cached_at DESC
-        LIMIT %s
-        """,
-        tuple(params),
-    )
-    candidates = await result.fetchall()
-
-    # Score and filter
-    scored_recipes = []
-    for recipe in candidates:
-        # Safety check: exclude recipes with user allergens
-        recipe_allergens = set(a.lower() for a in (recipe.get("allergens") or []))
-        if recipe_allergens & user_allergens:
-            continue
-
-        score = scorer.score_recipe(recipe, meal_type)
-        scored_recipes.append({
-            "recipe_id": recipe["recipe_id"],
-            "title": recipe["title"],
-            "score": score,
-            "source": "knowledge",
-        })
+    scores = scorer.score_recipes_batch(candidates, meal_type)
 
-    # Sort by score and return top N
-    scored_recipes.sort(key=lambda x: x["score"], reverse=True)
-    return scored_recipes[:top_n]
+    # Build results only for the top N
+    return [
+        {
+            "recipe_id": candidates[i]["recipe_id"],
+            "title": candidates[i]["title"],
+            "score": float(scores[i]),
+            "source": "knowledge",
+        }
+        for i in top_n_indices(scores, top_n).tolist()
+    ]
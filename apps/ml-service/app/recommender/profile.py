@@ -0,0 +1,124 @@
+"""Cached, batched access to user taste profiles shared by the recommenders."""
+
+import asyncio
+import uuid
+
+from cachetools import TTLCache
+
+from ..config import settings
+from ..db import get_db
+
+
+class UserProfileLoader:
+    """
+    DataLoader-style batcher for user_taste_profiles lookups.
+
+    Loads requested within a short window (BATCH_WAIT_MS) are coalesced
+    into a single ``user_id = ANY(...)`` query on a pooled connection, so
+    concurrent requests share one round-trip. A batch is flushed early
+    once it reaches BATCH_MAX users.
+    """
+
+    def __init__(self, wait_ms: float, max_batch: int):
+        self._wait = wait_ms / 1000
+        self._max_batch = max_batch
+        self._pending: dict[str, asyncio.Future] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, user_id: str) -> dict | None:
+        """Get a user's profile row, or None if the user has no profile."""
+        # Validate up front so a malformed id can't fail a whole batch, and
+        # canonicalize so it matches the user_id::text the query returns.
+        user_id = str(uuid.UUID(user_id))
+        future = self._pending.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[user_id] = future
+            if len(self._pending) >= self._max_batch:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._wait, self._dispatch)
+        # Shield so one cancelled caller doesn't cancel the shared result
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.create_task(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: dict[str, asyncio.Future]) -> None:
+        try:
+            async with get_db() as conn:
+                result = await conn.execute(
+                    """
+                    SELECT user_id::text AS user_id, preference_vector,
+                           interaction_count, content_weight, collab_weight,
+                           cold_start
+                    FROM user_taste_profiles
+                    WHERE user_id = ANY(%s::uuid[])
+                    """,
+                    (list(batch),),
+                )
+                rows = {row["user_id"]: row for row in await result.fetchall()}
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for user_id, future in batch.items():
+            if not future.done():
+                future.set_result(rows.get(user_id))
+
+
+_profile_loader = UserProfileLoader(settings.BATCH_WAIT_MS, settings.BATCH_MAX)
+
+# A hybrid request reads the same profile row from several recommenders;
+# keep it in-process briefly so only the first read hits the database.
+_profile_cache: TTLCache = TTLCache(
+    maxsize=settings.PROFILE_CACHE_MAX, ttl=settings.PROFILE_CACHE_TTL_S
+)
+_profile_lock = asyncio.Lock()
+# Bumped by invalidate_profile, so a load that started before an
+# invalidation doesn't cache the row it read
+_profile_generations: dict[str, int] = {}
+_MISSING = object()
+
+
+async def get_profile(user_id: str) -> dict | None:
+    """
+    Get a user's taste profile row, or None if the user has no profile.
+
+    Results (including misses) are cached for PROFILE_CACHE_TTL_S seconds.
+    The returned dict is shared between callers and must not be mutated.
+    """
+    user_id = str(uuid.UUID(user_id))
+    async with _profile_lock:
+        # A single get: a membership test followed by a lookup can race
+        # the entry's expiry and raise KeyError
+        profile = _profile_cache.get(user_id, _MISSING)
+        if profile is not _MISSING:
+            return profile
+        generation = _profile_generations.get(user_id, 0)
+
+    profile = await _profile_loader.load(user_id)
+
+    async with _profile_lock:
+        if _profile_generations.get(user_id, 0) == generation:
+            _profile_cache[user_id] = profile
+    return profile
+
+
+async def invalidate_profile(user_id: str) -> None:
+    """Drop a cached profile so the next read sees freshly trained values."""
+    user_id = str(uuid.UUID(user_id))
+    async with _profile_lock:
+        _profile_cache.pop(user_id, None)
+        _profile_generations[user_id] = _profile_generations.get(user_id, 0) + 1
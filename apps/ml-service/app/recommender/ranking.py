@@ -0,0 +1,104 @@
+"""Ranking helpers shared by the recommenders."""
+
+import logging
+
+import numpy as np
+import psycopg
+from psycopg import AsyncConnection, sql
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def top_n_indices(scores: np.ndarray, top_n: int) -> np.ndarray:
+    """
+    Indices of the top_n highest scores, best first.
+
+    Uses a linear-time partial selection and only sorts the survivors,
+    so ranking N candidates costs O(N + top_n log top_n).
+    """
+    if len(scores) > top_n:
+        top = np.argpartition(-scores, top_n)[:top_n]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+async def widen_ef_search(conn: AsyncConnection, limit: int) -> None:
+    """
+    Make sure an HNSW scan can return limit rows.
+
+    An HNSW index scan yields at most hnsw.ef_search candidates, before
+    any filtering, so a larger LIMIT would silently return fewer rows.
+    Raises ef_search above the configured floor for the rest of the
+    current transaction only, which ends when the connection goes back
+    to the pool.
+    """
+    if limit > settings.HNSW_EF_SEARCH:
+        await conn.execute(
+            "SELECT set_config('hnsw.ef_search', %s, true)", (str(limit),)
+        )
+
+
+async def nearest_by_embedding(
+    conn: AsyncConnection,
+    column: str,
+    embedding: np.ndarray,
+    top_n: int,
+    exclude_ids: list[str] | None,
+    source: str,
+) -> list[dict] | None:
+    """
+    Rank recipes by cosine similarity to embedding using a stored vector column.
+
+    The ORDER BY is served by the column's HNSW index. Returns None when
+    the column doesn't exist yet or has no populated rows, so callers can
+    fall back to scoring candidates in-process.
+    """
+    if not np.any(embedding):
+        return None  # Cosine distance is undefined for a zero vector
+
+    query = sql.SQL(
+        """
+        SELECT r.id::text AS recipe_id, r.title,
+               1 - (r.{column} <=> %(embedding)b) AS score
+        FROM recipes r
+        WHERE r.{column} IS NOT NULL
+        AND r.id != ALL(%(exclude_ids)s::uuid[])
+        ORDER BY r.{column} <=> %(embedding)b
+        LIMIT %(top_n)s
+        """
+    ).format(column=sql.Identifier(column))
+
+    exclude_ids = exclude_ids or []
+    try:
+        # Excluded rows are filtered after the index scan, so leave room for them
+        await widen_ef_search(conn, top_n + len(exclude_ids))
+        result = await conn.execute(
+            query,
+            {
+                "embedding": np.asarray(embedding, dtype=np.float32),
+                "exclude_ids": exclude_ids,
+                "top_n": top_n,
+            },
+        )
+    except psycopg.errors.UndefinedColumn:
+        # Migration adding the embedding columns not applied yet
+        await conn.rollback()
+        logger.warning("recipes.%s is missing; scoring in-process", column)
+        return None
+
+    rows = await result.fetchall()
+    if not rows:
+        return None
+
+    return [
+        {
+            "recipe_id": row["recipe_id"],
+            "title": row["title"],
+            "score": float(row["score"]),
+            "source": source,
+        }
+        for row in rows
+    ]
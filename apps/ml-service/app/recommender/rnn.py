@@ -10,12 +10,25 @@ The RNN processes the user's meal history as a sequence and predicts
 the next likely preferred recipes.
 """
 
+import functools
 import os
 
 import numpy as np
 from psycopg import AsyncConnection
 
 from ..config import settings
+from .ranking import nearest_by_embedding, top_n_indices
+
+
+# Fallback candidates when recipes.rnn_embedding isn't populated
+_CANDIDATES_QUERY = """
+    SELECT r.id::text AS recipe_id, r.title, r.ingredient_vector,
+           r.calories, r.protein_g, r.carbs_g, r.fat_g
+    FROM recipes r
+    WHERE r.id != ALL(%(exclude_ids)s::uuid[])
+    ORDER BY r.cached_at DESC
+    LIMIT %(limit)s
+"""
 
 
 class MealSequenceRNN:
@@ -39,12 +52,18 @@ class MealSequenceRNN:
         os.path.dirname(__file__), "..", "..", "notebooks", "weights", "rnn_weights.npz"
     )
 
+    _WEIGHT_NAMES = ("Wz", "Uz", "bz", "Wr", "Ur", "br", "Wh", "Uh", "bh", "Wo", "bo")
+
     def __init__(self):
         weights_path = settings.RNN_WEIGHTS_PATH or self._DEFAULT_WEIGHTS_PATH
         if weights_path and os.path.exists(weights_path):
             self._load_trained_weights(weights_path)
         else:
             self._init_random_weights()
+        # Inference runs in float32: half the memory traffic of float64 and
+        # plenty of precision for a 64-unit GRU
+        for name in self._WEIGHT_NAMES:
+            setattr(self, name, np.ascontiguousarray(getattr(self, name), dtype=np.float32))
 
     def _load_trained_weights(self, path: str) -> None:
         """Load weights exported from training notebook."""
@@ -94,12 +113,25 @@ class MealSequenceRNN:
         h_new = (1 - z) * h_prev + z * h_candidate
         return h_new
 
-    def forward(self, sequence: list[np.ndarray]) -> np.ndarray:
-        """Process a sequence of meal events and predict next preference."""
-        h = np.zeros(self.HIDDEN_DIM)
+    def forward(self, sequence: list[np.ndarray] | np.ndarray) -> np.ndarray:
+        """
+        Process a sequence of meal events and predict next preference.
 
-        for x in sequence:
-            h = self.gru_step(x, h)
+        Equivalent to running gru_step over the sequence, but the input
+        projections for every step are computed up front as one matmul per
+        gate, leaving only the recurrent terms inside the time loop.
+        """
+        X = np.asarray(sequence, dtype=np.float32)
+        XZ = X @ self.Wz + self.bz
+        XR = X @ self.Wr + self.br
+        XH = X @ self.Wh + self.bh
+
+        h = np.zeros(self.HIDDEN_DIM, dtype=np.float32)
+        for t in range(len(X)):
+            z = self._sigmoid(XZ[t] + h @ self.Uz)
+            r = self._sigmoid(XR[t] + h @ self.Ur)
+            h_candidate = np.tanh(XH[t] + (r * h) @ self.Uh)
+            h = (1 - z) * h + z * h_candidate
 
         # Project to output space
         output = h @ self.Wo + self.bo
@@ -111,27 +143,68 @@ class MealSequenceRNN:
         hour: int,
         meal_type: str,
     ) -> np.ndarray:
-        """Encode time-related features."""
-        # Day of week (one-hot style: sin/cos encoding for cyclical nature)
-        day_sin = np.sin(2 * np.pi * day_of_week / 7)
-        day_cos = np.cos(2 * np.pi * day_of_week / 7)
+        """Encode time-related features (a read-only row of _TIME_TABLE)."""
+        meal_idx = _MEAL_TYPES.get(meal_type, 1)
+        return _TIME_TABLE[day_of_week % 7, hour % 24, meal_idx]
+
+
+_MEAL_TYPES = {"breakfast": 0, "lunch": 1, "dinner": 2, "snack": 3}
+
+
+def _build_time_table() -> np.ndarray:
+    """
+    Precompute time features for every (day_of_week, hour, meal_type).
+
+    Day, hour and meal type each get a sin/cos encoding for their cyclical
+    nature, plus the meal index scaled to [0, 1]. There are only
+    7 * 24 * 4 combinations, so lookups replace per-row trig.
+    """
+    day = 2 * np.pi * np.arange(7) / 7
+    hour = 2 * np.pi * np.arange(24) / 24
+    meal = np.arange(4)
+
+    table = np.empty((7, 24, 4, 7), dtype=np.float32)
+    table[..., 0] = np.sin(day)[:, None, None]
+    table[..., 1] = np.cos(day)[:, None, None]
+    table[..., 2] = np.sin(hour)[None, :, None]
+    table[..., 3] = np.cos(hour)[None, :, None]
+    table[..., 4] = np.sin(2 * np.pi * meal / 4)
+    table[..., 5] = np.cos(2 * np.pi * meal / 4)
+    table[..., 6] = meal / 3.0
+    table.flags.writeable = False
+    return table
+
+
+_TIME_TABLE = _build_time_table()
 
-        # Hour (sin/cos encoding)
-        hour_sin = np.sin(2 * np.pi * hour / 24)
-        hour_cos = np.cos(2 * np.pi * hour / 24)
 
-        # Meal type encoding
-        meal_types = {"breakfast": 0, "lunch": 1, "dinner": 2, "snack": 3}
-        meal_idx = meal_types.get(meal_type, 1)
-        meal_sin = np.sin(2 * np.pi * meal_idx / 4)
-        meal_cos = np.cos(2 * np.pi * meal_idx / 4)
+@functools.lru_cache(maxsize=1)
+def get_rnn() -> MealSequenceRNN:
+    """
+    Shared RNN instance, built on first use.
+
+    Deferred so importing the module (e.g. in workers or tools that never
+    recommend) doesn't read weight files or allocate the model.
+    """
+    return MealSequenceRNN()
 
-        return np.array([day_sin, day_cos, hour_sin, hour_cos, meal_sin, meal_cos,
-                         float(meal_idx) / 3.0])
 
+def _fill_recipe_embedding(out: np.ndarray, recipe: dict) -> None:
+    """
+    Write a recipe's RNN embedding into a zeroed OUTPUT_DIM buffer.
 
-# Singleton RNN instance
-_rnn = MealSequenceRNN()
+    Uses the first 32 ingredient_vector dimensions (zero-padded), or a
+    simple macro-nutrient embedding when a recipe has no vector.
+    """
+    vector = recipe.get("ingredient_vector")
+    if vector is not None:
+        vector = vector[:len(out)]
+        out[:len(vector)] = vector
+    else:
+        out[0] = (recipe.get("calories") or 0) / 1000.0
+        out[1] = (recipe.get("protein_g") or 0) / 100.0
+        out[2] = (recipe.get("carbs_g") or 0) / 200.0
+        out[3] = (recipe.get("fat_g") or 0) / 100.0
 
 
 async def get_rnn_recommendations(
@@ -150,10 +223,8 @@ async def get_rnn_recommendations(
     # Get user's recent meal history with timestamps
     result = await conn.execute(
         """
-        SELECT ml.recipe_id, ml.meal_type, ml.logged_at,
+        SELECT ml.meal_type, ml.logged_at,
                r.calories, r.protein_g, r.carbs_g, r.fat_g,
-               r.sodium_mg, r.fiber_g, r.sugar_g,
-               r.ready_in_minutes, r.servings, r.diet_labels,
                r.ingredient_vector
         FROM meal_logs ml
         LEFT JOIN recipes r ON r.id = ml.recipe_id
@@ -168,89 +239,62 @@ async def get_rnn_recommendations(
     if len(history) < 3:
         return []  # Need minimum history for sequence modeling
 
-    # Build input sequence (reversed to chronological order)
-    sequence = []
-    for meal in reversed(history):
-        # Use recipe's ingredient_vector as embedding, or create from features
-        if meal.get("ingredient_vector") is not None:
-            recipe_emb = np.array(meal["ingredient_vector"])[:32]
-            # Pad if needed
-            if len(recipe_emb) < 32:
-                recipe_emb = np.pad(recipe_emb, (0, 32 - len(recipe_emb)))
-        else:
-            # Create a simple feature-based embedding
-            recipe_emb = np.zeros(32)
-            recipe_emb[0] = (meal.get("calories") or 0) / 1000.0
-            recipe_emb[1] = (meal.get("protein_g") or 0) / 100.0
-            recipe_emb[2] = (meal.get("carbs_g") or 0) / 200.0
-            recipe_emb[3] = (meal.get("fat_g") or 0) / 100.0
-
-        # Extract time features
+    # Build the input sequence (reversed to chronological order) in one
+    # preallocated buffer: recipe embedding, then time features, per row
+    emb_dim = MealSequenceRNN.OUTPUT_DIM
+    sequence = np.zeros((len(history), MealSequenceRNN.INPUT_DIM), dtype=np.float32)
+    for row, meal in zip(sequence, reversed(history)):
+        _fill_recipe_embedding(row[:emb_dim], meal)
+
         logged_at = meal["logged_at"]
-        time_features = _rnn.encode_time_features(
+        row[emb_dim:] = MealSequenceRNN.encode_time_features(
             day_of_week=logged_at.weekday() if hasattr(logged_at, "weekday") else 0,
             hour=logged_at.hour if hasattr(logged_at, "hour") else 12,
             meal_type=meal.get("meal_type") or "lunch",
         )
 
-        # Concatenate recipe embedding + time features
-        x = np.concatenate([recipe_emb, time_features])
-        sequence.append(x)
-
     # Get prediction for next meal
-    predicted_embedding = _rnn.forward(sequence)
+    predicted_embedding = get_rnn().forward(sequence)
 
-    # Find closest recipes to the predicted embedding
-    exclude_clause = ""
-    params: list = [top_n * 3]
-    if exclude_ids:
-        exclude_clause = "WHERE r.id != ALL(%s)"
-        params.insert(0, exclude_ids)
+    # Precomputed recipe embeddings let the HNSW index do the ranking
+    recommendations = await nearest_by_embedding(
+        conn, "rnn_embedding", predicted_embedding, top_n, exclude_ids, "rnn"
+    )
+    if recommendations is not None:
+        return recommendations
 
+    # Embeddings not populated yet: score recent candidates in-process
     result = await conn.execute(
-        f"""
-        SELECT id AS recipe_id, title, ingredient_vector,
-               calories, protein_g, carbs_g, fat_g
-        FROM recipes r
-        {exclude_clause}
-        ORDER BY cached_at DESC
-        LIMIT %s
-        """,
-        tuple(params),
+        _CANDIDATES_QUERY,
+        {"exclude_ids": exclude_ids or [], "limit": top_n * 3},
     )
-    candidates = await result.fetchall()
-
-    if not candidates:
+    if not result.rowcount:
         return []
 
-    # Score by cosine similarity to predicted embedding
-    scored = []
-    pred_norm = np.linalg.norm(predicted_embedding)
-
-    for recipe in candidates:
-        if recipe.get("ingredient_vector") is not None:
-            recipe_emb = np.array(recipe["ingredient_vector"])[:32]
-            if len(recipe_emb) < 32:
-                recipe_emb = np.pad(recipe_emb, (0, 32 - len(recipe_emb)))
-        else:
-            recipe_emb = np.zeros(32)
-            recipe_emb[0] = (recipe.get("calories") or 0) / 1000.0
-            recipe_emb[1] = (recipe.get("protein_g") or 0) / 100.0
-            recipe_emb[2] = (recipe.get("carbs_g") or 0) / 200.0
-            recipe_emb[3] = (recipe.get("fat_g") or 0) / 100.0
-
-        recipe_norm = np.linalg.norm(recipe_emb)
-        if pred_norm > 0 and recipe_norm > 0:
-            similarity = float(np.dot(predicted_embedding, recipe_emb) / (pred_norm * recipe_norm))
-        else:
-            similarity = 0.0
+    # Stream candidates straight into a preallocated embedding matrix
+    embeddings = np.zeros((result.rowcount, MealSequenceRNN.OUTPUT_DIM), dtype=np.float32)
+    recipe_ids: list[str] = []
+    titles: list[str] = []
+    async for recipe in result:
+        _fill_recipe_embedding(embeddings[len(recipe_ids)], recipe)
+        recipe_ids.append(recipe["recipe_id"])
+        titles.append(recipe["title"])
+
+    # Score all candidates by cosine similarity to the predicted embedding
+    norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(predicted_embedding)
+    similarities = np.divide(
+        embeddings @ predicted_embedding,
+        norms,
+        out=np.zeros(len(recipe_ids), dtype=np.float32),
+        where=norms > 0,
+    )
 
-        scored.append({
-            "recipe_id": recipe["recipe_id"],
-            "title": recipe["title"],
-            "score": similarity,
+    return [
+        {
+            "recipe_id": recipe_ids[i],
+            "title": titles[i],
+            "score": float(similarities[i]),
             "source": "rnn",
-        })
-
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return scored[:top_n]
+        }
+        for i in top_n_indices(similarities, top_n).tolist()
+    ]
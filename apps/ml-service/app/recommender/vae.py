@@ -8,12 +8,26 @@ in a continuous space. This enables:
 - Capturing non-linear relationships between ingredients and nutrition
 """
 
+import functools
 import os
 
 import numpy as np
 from psycopg import AsyncConnection
 
 from ..config import settings
+from .ranking import nearest_by_embedding, top_n_indices
+
+
+# Fallback candidates when recipes.vae_embedding isn't populated
+_CANDIDATES_QUERY = """
+    SELECT r.id::text AS recipe_id, r.title, r.calories, r.protein_g,
+           r.carbs_g, r.fat_g, r.sodium_mg, r.fiber_g, r.sugar_g,
+           r.ready_in_minutes, r.servings, r.diet_labels
+    FROM recipes r
+    WHERE r.id != ALL(%(exclude_ids)s::uuid[])
+    ORDER BY r.cached_at DESC
+    LIMIT %(limit)s
+"""
 
 
 class RecipeVAE:
@@ -38,12 +52,25 @@ class RecipeVAE:
         os.path.dirname(__file__), "..", "..", "notebooks", "weights", "vae_weights.npz"
     )
 
+    _WEIGHT_NAMES = (
+        "encoder_mu_w", "encoder_mu_b", "encoder_logvar_w", "encoder_logvar_b",
+        "decoder_w", "decoder_b", "feature_means", "feature_stds",
+    )
+
     def __init__(self):
         weights_path = settings.VAE_WEIGHTS_PATH or self._DEFAULT_WEIGHTS_PATH
-        if weights_path and os.path.exists(weights_path):
+        # Trained weights ship with normalization stats; otherwise they are
+        # fitted once at startup (see fit_vae_normalization)
+        self.normalization_fitted = False
+        self.trained = bool(weights_path) and os.path.exists(weights_path)
+        if self.trained:
             self._load_trained_weights(weights_path)
+            self.normalization_fitted = True
         else:
             self._init_random_weights()
+        # Inference runs in float32, matching extract_features
+        for name in self._WEIGHT_NAMES:
+            setattr(self, name, np.ascontiguousarray(getattr(self, name), dtype=np.float32))
 
     def _load_trained_weights(self, path: str) -> None:
         """Load weights exported from training notebook."""
@@ -93,7 +120,20 @@ class RecipeVAE:
 
     def extract_features(self, recipe: dict) -> np.ndarray:
         """Extract feature vector from recipe dict."""
-        features = np.array([
+        return np.array(self.feature_row(recipe), dtype=np.float32)
+
+    def extract_features_batch(self, recipes: list[dict]) -> np.ndarray:
+        """Extract an (N, FEATURE_DIM) feature matrix, one row per recipe dict."""
+        features = np.empty((len(recipes), self.FEATURE_DIM), dtype=np.float32)
+        for i, recipe in enumerate(recipes):
+            features[i] = self.feature_row(recipe)
+        return features
+
+    @staticmethod
+    def feature_row(recipe: dict) -> tuple:
+        """Raw feature values for one recipe, in FEATURE_DIM order."""
+        diet_labels = recipe.get("diet_labels") or []
+        return (
             recipe.get("calories") or 0,
             recipe.get("protein_g") or 0,
             recipe.get("carbs_g") or 0,
@@ -103,24 +143,66 @@ class RecipeVAE:
             recipe.get("sugar_g") or 0,
             recipe.get("ready_in_minutes") or 30,
             recipe.get("servings") or 4,
-            1.0 if "vegetarian" in (recipe.get("diet_labels") or []) else 0.0,
-            1.0 if "vegan" in (recipe.get("diet_labels") or []) else 0.0,
-            1.0 if "gluten free" in (recipe.get("diet_labels") or []) else 0.0,
-        ], dtype=np.float64)
-        return features
+            "vegetarian" in diet_labels,
+            "vegan" in diet_labels,
+            "gluten free" in diet_labels,
+        )
+
+    def encode_batch(self, features: np.ndarray) -> np.ndarray:
+        """Deterministic embeddings (latent means) for an (N, FEATURE_DIM) matrix."""
+        normalized = (features - self.feature_means) / (self.feature_stds + 1e-8)
+        return normalized @ self.encoder_mu_w + self.encoder_mu_b
 
     def fit_normalization(self, recipes: list[dict]) -> None:
         """Fit normalization statistics from recipe corpus."""
         if not recipes:
             return
-        features = np.array([self.extract_features(r) for r in recipes])
-        self.feature_means = features.mean(axis=0)
-        self.feature_stds = features.std(axis=0)
+        self.fit_normalization_from_matrix(self.extract_features_batch(recipes))
+
+    def fit_normalization_from_matrix(self, features: np.ndarray) -> None:
+        """Fit normalization statistics from an (N, FEATURE_DIM) feature matrix."""
+        if not len(features):
+            return
+        self.feature_means = features.mean(axis=0, dtype=np.float64).astype(np.float32)
+        self.feature_stds = features.std(axis=0, dtype=np.float64).astype(np.float32)
         self.feature_stds[self.feature_stds == 0] = 1.0
+        self.normalization_fitted = True
+
+
+@functools.lru_cache(maxsize=1)
+def get_vae() -> RecipeVAE:
+    """
+    Shared VAE instance, built on first use.
+
+    Deferred so importing the module (e.g. in workers or tools that never
+    recommend) doesn't read weight files or allocate the model.
+    """
+    return RecipeVAE()
+
+
+async def fit_vae_normalization(conn: AsyncConnection, sample_size: int = 5000) -> None:
+    """
+    Fit the VAE's feature normalization from a sample of recent recipes.
 
+    Called once at startup. A no-op when trained weights (which include
+    the normalization stats) were loaded. Stats are never refitted
+    per request, so the shared model stays read-only while serving.
+    """
+    vae = get_vae()
+    if vae.normalization_fitted:
+        return
 
-# Singleton VAE instance
-_vae = RecipeVAE()
+    result = await conn.execute(
+        """
+        SELECT calories, protein_g, carbs_g, fat_g, sodium_mg, fiber_g,
+               sugar_g, ready_in_minutes, servings, diet_labels
+        FROM recipes
+        ORDER BY cached_at DESC
+        LIMIT %s
+        """,
+        (sample_size,),
+    )
+    vae.fit_normalization(await result.fetchall())
 
 
 async def get_vae_recommendations(
@@ -135,12 +217,15 @@ async def get_vae_recommendations(
     Maps the user's interacted recipes into latent space, computes
     an average user embedding, and finds closest recipes in that space.
     """
-    # Get user's positively-interacted recipes
+    vae = get_vae()
+
+    # Get user's positively-interacted recipes. Rows are streamed straight
+    # into preallocated feature buffers rather than kept as dicts.
     result = await conn.execute(
         """
-        SELECT r.id AS recipe_id, r.title, r.calories, r.protein_g, r.carbs_g,
-               r.fat_g, r.sodium_mg, r.fiber_g, r.sugar_g,
-               r.ready_in_minutes, r.servings, r.diet_labels
+        SELECT r.calories, r.protein_g, r.carbs_g, r.fat_g, r.sodium_mg,
+               r.fiber_g, r.sugar_g, r.ready_in_minutes, r.servings,
+               r.diet_labels
         FROM user_interactions ui
         JOIN recipes r ON r.id = ui.recipe_id
         WHERE ui.user_id = %s AND ui.interaction_value > 0
@@ -149,68 +234,62 @@ async def get_vae_recommendations(
         """,
         (user_id,),
     )
-    user_recipes = await result.fetchall()
-
-    if not user_recipes:
+    if not result.rowcount:
         return []
 
-    # Fit normalization on available recipes
-    _vae.fit_normalization(user_recipes)
-
-    # Compute user embedding as average of interacted recipe embeddings
-    embeddings = []
-    for recipe in user_recipes:
-        features = _vae.extract_features(recipe)
-        embedding = _vae.get_embedding(features)
-        embeddings.append(embedding)
+    user_features = np.empty((result.rowcount, RecipeVAE.FEATURE_DIM), dtype=np.float32)
+    i = 0
+    async for recipe in result:
+        user_features[i] = vae.feature_row(recipe)
+        i += 1
+
+    # User embedding is the average of their interacted recipe embeddings
+    user_embedding = vae.encode_batch(user_features).mean(axis=0)
+
+    # Precomputed recipe embeddings let the HNSW index do the ranking, but
+    # only with trained weights: without them each worker fits its own
+    # normalization at startup, so stored embeddings written by other
+    # workers (or before a restart) live in a different latent space
+    if vae.trained:
+        recommendations = await nearest_by_embedding(
+            conn, "vae_embedding", user_embedding, top_n, exclude_ids, "vae"
+        )
+        if recommendations is not None:
+            return recommendations
+
+    # Untrained model or embeddings not populated yet: score recent
+    # candidates in-process, in this worker's own latent space
+    result = await conn.execute(
+        _CANDIDATES_QUERY,
+        {"exclude_ids": exclude_ids or [], "limit": top_n * 3},
+    )
+    if not result.rowcount:
+        return []
 
-    user_embedding = np.mean(embeddings, axis=0)
+    features = np.empty((result.rowcount, RecipeVAE.FEATURE_DIM), dtype=np.float32)
+    recipe_ids: list[str] = []
+    titles: list[str] = []
+    async for recipe in result:
+        features[len(recipe_ids)] = vae.feature_row(recipe)
+        recipe_ids.append(recipe["recipe_id"])
+        titles.append(recipe["title"])
 
-    # Get candidate recipes
-    exclude_clause = ""
-    params: list = [top_n * 3]
-    if exclude_ids:
-        exclude_clause = "WHERE r.id != ALL(%s)"
-        params.insert(0, exclude_ids)
+    embeddings = vae.encode_batch(features)
 
-    result = await conn.execute(
-        f"""
-        SELECT id AS recipe_id, title, calories, protein_g, carbs_g,
-               fat_g, sodium_mg, fiber_g, sugar_g,
-               ready_in_minutes, servings, diet_labels
-        FROM recipes r
-        {exclude_clause}
-        ORDER BY cached_at DESC
-        LIMIT %s
-        """,
-        tuple(params),
+    # Score all candidates at once by cosine similarity in latent space
+    norms = np.linalg.norm(embeddings, axis=1)
+    similarities = (embeddings @ user_embedding) / (
+        np.linalg.norm(user_embedding) * norms + 1e-8
     )
-    candidates = await result.fetchall()
 
-    if not candidates:
-        return []
+    top = top_n_indices(similarities, top_n)
 
-    # Fit normalization on all candidates too
-    _vae.fit_normalization(candidates + user_recipes)
-
-    # Score candidates by latent space proximity
-    scored = []
-    for recipe in candidates:
-        features = _vae.extract_features(recipe)
-        embedding = _vae.get_embedding(features)
-
-        # Cosine similarity in latent space
-        dot = np.dot(user_embedding, embedding)
-        norm_u = np.linalg.norm(user_embedding)
-        norm_r = np.linalg.norm(embedding)
-        similarity = dot / (norm_u * norm_r + 1e-8)
-
-        scored.append({
-            "recipe_id": recipe["recipe_id"],
-            "title": recipe["title"],
-            "score": float(similarity),
+    return [
+        {
+            "recipe_id": recipe_ids[i],
+            "title": titles[i],
+            "score": float(similarities[i]),
             "source": "vae",
-        })
-
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return scored[:top_n]
+        }
+        for i in top.tolist()
+    ]
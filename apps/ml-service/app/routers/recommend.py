@@ -1,6 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from psycopg_pool import PoolTimeout
 
-from ..db import get_db
 from ..models.schemas import RecommendRequest, RecommendResponse
 from ..recommender.hybrid import get_hybrid_recommendations
 
@@ -10,10 +10,14 @@ router = APIRouter()
 @router.post("/recommend", response_model=RecommendResponse)
 async def recommend(request: RecommendRequest) -> RecommendResponse:
     """Get personalized recipe recommendations for a user."""
-    async with get_db() as conn:
+    # The hybrid recommender checks out its own connections per model
+    try:
         return await get_hybrid_recommendations(
-            conn,
             user_id=request.user_id,
             top_n=request.top_n,
             exclude_ids=request.exclude_recipe_ids or None,
         )
+    except PoolTimeout:
+        raise HTTPException(
+            status_code=503, detail="Database connection pool exhausted"
+        ) from None
@@ -1,86 +1,142 @@
 """Reusable data loading functions for Kaggle datasets and database tables."""
 
+from collections.abc import Iterator
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import psycopg
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from numpy.lib.stride_tricks import sliding_window_view
+from psycopg.rows import tuple_row
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 
+# Rows per round-trip when streaming tables out of the database
+_FETCH_SIZE = 10_000
+
+_MEAL_TYPES = {"breakfast": 0, "lunch": 1, "dinner": 2, "snack": 3}
+
+# Columns extract_vae_features() reads; pass as load_kaggle_dataset(columns=...)
+VAE_FEATURE_COLUMNS = [
+    "calories", "protein_g", "carbs_g", "fat_g", "sodium_mg", "fiber_g",
+    "sugar_g", "ready_in_minutes", "servings", "diet_labels",
+]
+
 
 # ---------------------------------------------------------------------------
 # Database loaders
 # ---------------------------------------------------------------------------
 
 
+def _load_frame(conn: psycopg.Connection, name: str, query: str) -> pd.DataFrame:
+    """Run a query on a server-side cursor and build a DataFrame from it.
+
+    Rows are fetched as plain tuples in _FETCH_SIZE batches, avoiding a
+    dict per row and holding at most one batch of raw results at a time.
+    """
+    # Server-side cursors need a transaction, even on autocommit connections
+    with conn.transaction(), conn.cursor(name=f"load_{name}", row_factory=tuple_row) as cur:
+        cur.itersize = _FETCH_SIZE
+        cur.execute(query)
+        columns = [col.name for col in cur.description]
+        rows = []
+        while batch := cur.fetchmany(_FETCH_SIZE):
+            rows.extend(batch)
+    return pd.DataFrame(rows, columns=columns) if rows else pd.DataFrame()
+
+
+_ARROW_LABELS = pd.ArrowDtype(pa.list_(pa.string()))
+
+# recipes columns loaded for training, with their Postgres types for COPY
+_RECIPE_COLUMNS = (
+    ("id", "uuid"), ("title", "text"), ("calories", "float8"),
+    ("protein_g", "float8"), ("carbs_g", "float8"), ("fat_g", "float8"),
+    ("sodium_mg", "float8"), ("fiber_g", "float8"), ("sugar_g", "float8"),
+    ("ready_in_minutes", "int4"), ("servings", "int4"),
+    ("diet_labels", "text[]"), ("allergens", "text[]"), ("cuisine_types", "text[]"),
+    ("ingredient_vector", "vector"), ("nutrition_vector", "vector"),
+)
+
+
 def load_recipes_from_db(conn: psycopg.Connection) -> pd.DataFrame:
-    """Load all recipes from the database."""
-    cur = conn.execute(
-        """
-        SELECT id, title, calories, protein_g, carbs_g, fat_g,
-               sodium_mg, fiber_g, sugar_g, ready_in_minutes, servings,
-               diet_labels, allergens, cuisine_types,
-               ingredient_vector, nutrition_vector
-        FROM recipes
-        """
-    )
-    rows = cur.fetchall()
-    return pd.DataFrame(rows) if rows else pd.DataFrame()
+    """Load all recipes from the database.
+
+    Rows are streamed with a binary COPY, which skips per-row text
+    parsing and cursor round-trips. COPY can only decode the vector
+    columns once pgvector is registered on the connection (as
+    get_connection() does); otherwise this falls back to a cursor.
+    """
+    columns = [name for name, _ in _RECIPE_COLUMNS]
+    query = f"SELECT {', '.join(columns)} FROM recipes"
+    if conn.adapters.types.get("vector") is None:
+        df = _load_frame(conn, "recipes", query)
+    else:
+        with conn.cursor() as cur, cur.copy(f"COPY ({query}) TO STDOUT (FORMAT BINARY)") as copy:
+            copy.set_types([pg_type for _, pg_type in _RECIPE_COLUMNS])
+            rows = list(copy.rows())
+        df = pd.DataFrame(rows, columns=columns) if rows else pd.DataFrame()
+
+    if not df.empty:
+        # As an Arrow list column, _diet_flags() can use pyarrow.compute
+        df["diet_labels"] = df["diet_labels"].astype(_ARROW_LABELS)
+    return df
 
 
 def load_interactions_from_db(conn: psycopg.Connection) -> pd.DataFrame:
     """Load all user interactions from the database."""
-    cur = conn.execute(
+    return _load_frame(
+        conn,
+        "user_interactions",
         """
         SELECT user_id, recipe_id, interaction_type,
                interaction_value, created_at
         FROM user_interactions
         ORDER BY created_at
-        """
+        """,
     )
-    rows = cur.fetchall()
-    return pd.DataFrame(rows) if rows else pd.DataFrame()
 
 
 def load_meal_logs_from_db(conn: psycopg.Connection) -> pd.DataFrame:
     """Load all meal logs from the database."""
-    cur = conn.execute(
+    return _load_frame(
+        conn,
+        "meal_logs",
         """
         SELECT user_id, recipe_id, meal_type, food_name,
                calories, protein_g, carbs_g, fat_g, logged_at
         FROM meal_logs
         ORDER BY logged_at
-        """
+        """,
     )
-    rows = cur.fetchall()
-    return pd.DataFrame(rows) if rows else pd.DataFrame()
 
 
 def load_user_profiles_from_db(conn: psycopg.Connection) -> pd.DataFrame:
     """Load user taste profiles from the database."""
-    cur = conn.execute(
+    return _load_frame(
+        conn,
+        "user_taste_profiles",
         """
         SELECT user_id, preference_vector, interaction_count,
                cold_start, content_weight, collab_weight, last_trained_at
         FROM user_taste_profiles
-        """
+        """,
     )
-    rows = cur.fetchall()
-    return pd.DataFrame(rows) if rows else pd.DataFrame()
 
 
 def load_dietary_preferences_from_db(conn: psycopg.Connection) -> pd.DataFrame:
     """Load dietary preferences from the database."""
-    cur = conn.execute(
+    return _load_frame(
+        conn,
+        "dietary_preferences",
         """
         SELECT user_id, diet_type, calorie_target, protein_target_g,
                carb_target_g, fat_target_g, cuisine_preferences
         FROM dietary_preferences
-        """
+        """,
     )
-    rows = cur.fetchall()
-    return pd.DataFrame(rows) if rows else pd.DataFrame()
 
 
 # ---------------------------------------------------------------------------
@@ -88,17 +144,31 @@ def load_dietary_preferences_from_db(conn: psycopg.Connection) -> pd.DataFrame:
 # ---------------------------------------------------------------------------
 
 
-def load_kaggle_dataset(name: str) -> pd.DataFrame:
+def load_kaggle_dataset(name: str, columns: list[str] | None = None) -> pd.DataFrame:
     """Load a processed Kaggle dataset from the data/ directory.
 
-    Tries parquet first (faster), falls back to CSV.
+    Tries parquet first (faster), falls back to CSV. With ``columns``,
+    only those columns are read (names the dataset doesn't have are
+    skipped), so callers needing a few features don't pay for the rest.
+    Parquet list columns (e.g. diet_labels) stay Arrow-backed rather than
+    becoming an object column of per-row arrays. Files are best packed
+    with repack_parquet() first.
     """
     parquet_path = DATA_DIR / f"{name}.parquet"
     csv_path = DATA_DIR / f"{name}.csv"
 
     if parquet_path.exists():
-        return pd.read_parquet(parquet_path)
+        if columns is not None:
+            available = set(pq.read_schema(parquet_path).names)
+            columns = [c for c in columns if c in available]
+        table = pq.read_table(parquet_path, columns=columns, use_threads=True)
+        return table.to_pandas(
+            split_blocks=True, self_destruct=True, types_mapper=_arrow_list_dtype
+        )
     elif csv_path.exists():
+        if columns is not None:
+            wanted = set(columns)
+            return pd.read_csv(csv_path, usecols=lambda c: c in wanted)
         return pd.read_csv(csv_path)
     else:
         raise FileNotFoundError(
@@ -107,40 +177,198 @@ def load_kaggle_dataset(name: str) -> pd.DataFrame:
         )
 
 
+def load_kaggle_dataset_batched(
+    name: str, columns: list[str] | None = None, batch_size: int = 100_000
+) -> Iterator[pd.DataFrame]:
+    """Load a Kaggle dataset as an iterator of batch_size-row DataFrames.
+
+    Same lookup and column handling as load_kaggle_dataset(), but only
+    one batch is materialized at a time, so large datasets (e.g. the
+    Food.com reviews) can be processed in constant memory. Raises
+    FileNotFoundError immediately, not on first iteration.
+    """
+    parquet_path = DATA_DIR / f"{name}.parquet"
+    csv_path = DATA_DIR / f"{name}.csv"
+
+    if parquet_path.exists():
+        parquet_file = pq.ParquetFile(parquet_path)
+        if columns is not None:
+            available = set(parquet_file.schema_arrow.names)
+            columns = [c for c in columns if c in available]
+        return (
+            batch.to_pandas(types_mapper=_arrow_list_dtype)
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+        )
+    elif csv_path.exists():
+        wanted = None if columns is None else set(columns)
+        return iter(pd.read_csv(
+            csv_path,
+            usecols=None if wanted is None else (lambda c: c in wanted),
+            chunksize=batch_size,
+        ))
+    else:
+        raise FileNotFoundError(
+            f"Dataset '{name}' not found in {DATA_DIR}. "
+            "Run notebook 00 to download datasets first."
+        )
+
+
+# Parquet columns repack_parquet() stores as FixedSizeList<float32>
+_VECTOR_COLUMNS = ("ingredient_vector", "nutrition_vector")
+
+
+def repack_parquet(path: str | Path) -> Path:
+    """Rewrite a parquet file in the layout that reads back fastest.
+
+    One-shot utility for files in data/ (e.g. after notebook 00 writes
+    them). Vector columns whose vectors all share one length become
+    FixedSizeList<float32>, which reads back without per-row list
+    offsets and at half the size of float64. Columns are
+    dictionary-encoded (this covers the diet_labels / allergens /
+    cuisine_types values) and Snappy-compressed in 64k-row groups.
+    Vectors keep every dimension. The file is replaced atomically.
+    """
+    path = Path(path)
+    table = pq.read_table(path)
+    for name in _VECTOR_COLUMNS:
+        if name in table.column_names:
+            index = table.column_names.index(name)
+            table = table.set_column(index, name, _fixed_size_vectors(table[name]))
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    pq.write_table(
+        table, tmp_path, compression="snappy", use_dictionary=True, row_group_size=64_000
+    )
+    tmp_path.replace(path)
+    return path
+
+
+def _fixed_size_vectors(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Cast a list column to FixedSizeList<float32> if every vector has one length."""
+    if not (pa.types.is_list(column.type) or pa.types.is_large_list(column.type)):
+        return column  # e.g. vectors stored as strings
+    lengths = pc.min_max(pc.list_value_length(column))
+    size = lengths["min"].as_py()
+    if size is None or size != lengths["max"].as_py():
+        return column  # all null, or ragged
+    return pc.cast(column, pa.list_(pa.float32(), size))
+
+
+def _arrow_list_dtype(arrow_type: pa.DataType) -> pd.ArrowDtype | None:
+    """types_mapper for to_pandas(): keep list columns Arrow-backed."""
+    if (
+        pa.types.is_list(arrow_type)
+        or pa.types.is_large_list(arrow_type)
+        or pa.types.is_fixed_size_list(arrow_type)
+    ):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def _arrow_array(column: pd.Series) -> pa.Array:
+    """The single pyarrow Array behind an ArrowDtype column."""
+    array = pa.array(column.array)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    return array
+
+
 # ---------------------------------------------------------------------------
 # Feature extraction (matches production inference code)
 # ---------------------------------------------------------------------------
 
 
+# Numeric VAE feature columns and the value used when missing, in order
+_VAE_NUMERIC_DEFAULTS = (
+    ("calories", 0), ("protein_g", 0), ("carbs_g", 0), ("fat_g", 0),
+    ("sodium_mg", 0), ("fiber_g", 0), ("sugar_g", 0),
+    ("ready_in_minutes", 30), ("servings", 4),
+)
+
+
 def extract_vae_features(recipes_df: pd.DataFrame) -> np.ndarray:
     """Extract 12D feature vectors for VAE training.
 
     Matches RecipeVAE.extract_features() in app/recommender/vae.py exactly.
+    Columns are written straight into one preallocated (N, 12) buffer.
+    """
+    features = np.empty((len(recipes_df), 12), dtype=np.float64)
+    _fill_vae_features(recipes_df, features)
+    return features
+
+
+def extract_vae_features_batched(name: str, batch_size: int = 100_000) -> np.ndarray:
+    """extract_vae_features() for a Kaggle dataset, read batch by batch.
+
+    Only one batch of VAE_FEATURE_COLUMNS is held as a DataFrame at a
+    time. For parquet the (N, 12) output is preallocated from the file's
+    row count, so peak memory is the output plus one batch.
+    """
+    batches = load_kaggle_dataset_batched(name, VAE_FEATURE_COLUMNS, batch_size)
+    parquet_path = DATA_DIR / f"{name}.parquet"
+    if not parquet_path.exists():
+        # CSV: row count unknown up front
+        chunks = [extract_vae_features(batch) for batch in batches]
+        return np.concatenate(chunks) if chunks else np.empty((0, 12))
+
+    features = np.empty((pq.ParquetFile(parquet_path).metadata.num_rows, 12))
+    start = 0
+    for batch in batches:
+        _fill_vae_features(batch, features[start:start + len(batch)])
+        start += len(batch)
+    return features
+
+
+def _fill_vae_features(recipes_df: pd.DataFrame, out: np.ndarray) -> None:
+    """Write recipes_df's 12D VAE features into the (N, 12) buffer out."""
+    for i, (column, default) in enumerate(_VAE_NUMERIC_DEFAULTS):
+        if column in recipes_df.columns:
+            out[:, i] = recipes_df[column].to_numpy(dtype=np.float64, na_value=default)
+        else:
+            out[:, i] = default
+    _diet_flags(recipes_df, out=out[:, 9:])
+
+
+# Column of each diet flag in the VAE features' last three dimensions
+_DIET_FLAG_COLUMNS = {"vegetarian": 0, "vegan": 1, "gluten free": 2}
+_DIET_FLAG_LABELS = pa.array(list(_DIET_FLAG_COLUMNS))
+
+
+def _diet_flags(df: pd.DataFrame, out: np.ndarray | None = None) -> np.ndarray:
+    """(N, 3) vegetarian/vegan/gluten-free flags from the diet_labels column.
+
+    One pass over the column collects every (row, flag) hit, then all
+    three flags are set with a single scatter (into ``out`` if given).
+    Arrow list columns are matched with pyarrow.compute; in object
+    columns labels may be lists or arrays, anything else counts as no
+    labels.
     """
-    features = np.column_stack([
-        recipes_df.get("calories", pd.Series(0, index=recipes_df.index)).fillna(0).values,
-        recipes_df.get("protein_g", pd.Series(0, index=recipes_df.index)).fillna(0).values,
-        recipes_df.get("carbs_g", pd.Series(0, index=recipes_df.index)).fillna(0).values,
-        recipes_df.get("fat_g", pd.Series(0, index=recipes_df.index)).fillna(0).values,
-        recipes_df.get("sodium_mg", pd.Series(0, index=recipes_df.index)).fillna(0).values,
-        recipes_df.get("fiber_g", pd.Series(0, index=recipes_df.index)).fillna(0).values,
-        recipes_df.get("sugar_g", pd.Series(0, index=recipes_df.index)).fillna(0).values,
-        recipes_df.get("ready_in_minutes", pd.Series(30, index=recipes_df.index)).fillna(30).values,
-        recipes_df.get("servings", pd.Series(4, index=recipes_df.index)).fillna(4).values,
-        _diet_flag(recipes_df, "vegetarian"),
-        _diet_flag(recipes_df, "vegan"),
-        _diet_flag(recipes_df, "gluten free"),
-    ])
-    return features.astype(np.float64)
-
-
-def _diet_flag(df: pd.DataFrame, label: str) -> np.ndarray:
-    """Extract a boolean diet flag from diet_labels column."""
+    if out is None:
+        out = np.zeros((len(df), len(_DIET_FLAG_COLUMNS)))
+    else:
+        out.fill(0.0)
     if "diet_labels" not in df.columns:
-        return np.zeros(len(df))
-    return df["diet_labels"].apply(
-        lambda x: 1.0 if isinstance(x, list) and label in x else 0.0
-    ).values
+        return out
+
+    column = df["diet_labels"]
+    if _arrow_list_dtype(getattr(column.dtype, "pyarrow_dtype", pa.null())):
+        labels = _arrow_array(column)
+        flat_cols = pc.index_in(pc.list_flatten(labels), value_set=_DIET_FLAG_LABELS)
+        hit = flat_cols.is_valid()
+        rows = pc.list_parent_indices(labels).filter(hit).to_numpy()
+        out[rows, flat_cols.filter(hit).to_numpy()] = 1.0
+        return out
+
+    rows, cols = [], []
+    for i, labels in enumerate(column.to_numpy()):
+        if isinstance(labels, (list, np.ndarray)):
+            for label in labels:
+                col = _DIET_FLAG_COLUMNS.get(label)
+                if col is not None:
+                    rows.append(i)
+                    cols.append(col)
+    out[rows, cols] = 1.0
+    return out
 
 
 def build_rnn_sequences(
@@ -154,71 +382,140 @@ def build_rnn_sequences(
     - sequences: (N, seq_len, 39) input arrays
     - targets: (N, 32) next-meal recipe embeddings
     """
-    from ..utils.data_loader import _encode_time_features
-
-    sequences = []
-    targets = []
-
-    # Group by user, sort by time
-    for _user_id, user_logs in meal_logs_df.groupby("user_id"):
-        user_logs = user_logs.sort_values("logged_at")
-        if len(user_logs) < seq_len + 1:
-            continue
-
-        # Build feature vectors for each meal
-        meal_vectors = []
-        for _, log in user_logs.iterrows():
-            recipe_emb = _get_recipe_embedding(log, recipes_df)
-            time_feat = _encode_time_features(log["logged_at"], log.get("meal_type", "lunch"))
-            meal_vectors.append(np.concatenate([recipe_emb, time_feat]))
-
-        # Sliding window
-        for i in range(len(meal_vectors) - seq_len):
-            seq = np.array(meal_vectors[i : i + seq_len])
-            # Target is the recipe embedding of the next meal
-            target_log = user_logs.iloc[i + seq_len]
-            target_emb = _get_recipe_embedding(target_log, recipes_df)
-            sequences.append(seq)
-            targets.append(target_emb)
-
-    if not sequences:
+    # All logs in (user, time) order; each user is a contiguous run
+    logs = meal_logs_df[meal_logs_df["user_id"].notna()]
+    logs = logs.sort_values(["user_id", "logged_at"], kind="stable")
+    user_ids = logs["user_id"].to_numpy()
+    bounds = np.concatenate((
+        [0], np.flatnonzero(user_ids[1:] != user_ids[:-1]) + 1, [len(logs)]
+    ))
+
+    # A user with M meals yields M - seq_len windows (none if M <= seq_len)
+    counts = np.maximum(np.diff(bounds) - seq_len, 0)
+    total = int(counts.sum())
+    if total == 0:
         return np.array([]).reshape(0, seq_len, 39), np.array([]).reshape(0, 32)
 
-    return np.array(sequences), np.array(targets)
+    # One (M, 39) row per meal: recipe embedding + time features
+    meal_matrix = np.empty((len(logs), 39))
+    meal_matrix[:, :32] = _recipe_embeddings(logs, _recipe_embedding_table(recipes_df))
+    meal_matrix[:, 32:] = _encode_time_features_batch(logs)
+
+    # Window starting at meal i covers meals i..i+seq_len-1 and predicts
+    # meal i+seq_len's recipe embedding. Valid starts are the first
+    # counts[u] meals of each user; gather them all in one exact-size copy.
+    first = np.repeat(bounds[:-1], counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    starts = first + within
+
+    windows = sliding_window_view(meal_matrix, (seq_len, 39))[:, 0]
+    return windows[starts], meal_matrix[starts + seq_len, :32]
+
+
+def _recipe_embedding_table(recipes_df: pd.DataFrame) -> tuple[pd.Index, np.ndarray]:
+    """32D embeddings for every recipe with an ingredient_vector.
+
+    Returns (ids, embeddings) where embeddings[i] is ids[i]'s
+    ingredient_vector truncated/zero-padded to 32D. Built once per call so
+    meal logs are matched with a hash lookup instead of a scan of
+    recipes_df. For duplicate ids the first row wins.
+    """
+    if recipes_df.empty or "ingredient_vector" not in recipes_df.columns:
+        return pd.Index([]), np.zeros((0, 32))
+
+    recipes = recipes_df.drop_duplicates("id")
+    column = recipes["ingredient_vector"]
+    arrow_type = getattr(column.dtype, "pyarrow_dtype", None)
+    if arrow_type is not None and pa.types.is_fixed_size_list(arrow_type):
+        # Packed by repack_parquet(): slice the flat values buffer directly
+        has_vector = column.notna().to_numpy()
+        flat = pc.list_flatten(_arrow_array(column[has_vector])).to_numpy(zero_copy_only=False)
+        width = min(arrow_type.list_size, 32)
+        embeddings = np.zeros((int(has_vector.sum()), 32))
+        embeddings[:, :width] = flat.reshape(-1, arrow_type.list_size)[:, :width]
+        return pd.Index(recipes["id"].to_numpy()[has_vector]), embeddings
+
+    vectors = column.to_numpy()
+    has_vector = np.array([_is_vector(v) for v in vectors], dtype=bool)
+
+    embeddings = np.zeros((int(has_vector.sum()), 32))
+    for row, vec in zip(embeddings, vectors[has_vector]):
+        vec = np.asarray(vec)[:32]
+        row[: len(vec)] = vec
+    return pd.Index(recipes["id"].to_numpy()[has_vector]), embeddings
+
+
+def _is_vector(value) -> bool:
+    """Whether an ingredient_vector cell holds a vector (missing ones are None/NaN/NA)."""
+    return value is not None and value is not pd.NA and not isinstance(value, float)
+
+
+def _recipe_embeddings(
+    user_logs: pd.DataFrame, recipe_table: tuple[pd.Index, np.ndarray]
+) -> np.ndarray:
+    """(M, 32) recipe embeddings for a user's meal logs.
+
+    The recipe's embedding from _recipe_embedding_table(), or a
+    macro-nutrient proxy from the log when the recipe has no vector.
+    """
+    ids, embeddings = recipe_table
+    if "recipe_id" in user_logs.columns:
+        idx = ids.get_indexer(user_logs["recipe_id"])
+    else:
+        idx = np.full(len(user_logs), -1)
+    has_vector = idx >= 0
 
+    emb = np.zeros((len(user_logs), 32))
+    emb[has_vector] = embeddings[idx[has_vector]]
 
-def _get_recipe_embedding(log: pd.Series, recipes_df: pd.DataFrame) -> np.ndarray:
-    """Get 32D recipe embedding for a meal log entry."""
-    emb = np.zeros(32)
-    if "recipe_id" in log and log["recipe_id"] is not None and not recipes_df.empty:
-        match = recipes_df[recipes_df["id"] == log["recipe_id"]]
-        if not match.empty and match.iloc[0].get("ingredient_vector") is not None:
-            vec = np.array(match.iloc[0]["ingredient_vector"])[:32]
-            if len(vec) < 32:
-                vec = np.pad(vec, (0, 32 - len(vec)))
-            return vec
     # Fallback: feature-based proxy
-    emb[0] = (log.get("calories") or 0) / 1000.0
-    emb[1] = (log.get("protein_g") or 0) / 100.0
-    emb[2] = (log.get("carbs_g") or 0) / 200.0
-    emb[3] = (log.get("fat_g") or 0) / 100.0
+    proxy = ~has_vector
+    for col, (column, scale) in enumerate(
+        [("calories", 1000.0), ("protein_g", 100.0), ("carbs_g", 200.0), ("fat_g", 100.0)]
+    ):
+        if column in user_logs.columns:
+            values = pd.to_numeric(user_logs[column], errors="coerce").fillna(0).to_numpy()
+            emb[proxy, col] = values[proxy] / scale
     return emb
 
 
+def _build_time_table() -> np.ndarray:
+    """Time features for every (day_of_week, hour, meal_type) combination.
+
+    Only 7 * 24 * 4 distinct encodings exist, so they are computed once
+    and looked up, mirroring _TIME_TABLE in app/recommender/rnn.py.
+    """
+    day = 2 * np.pi * np.arange(7) / 7
+    hour = 2 * np.pi * np.arange(24) / 24
+    meal = np.arange(4)
+
+    table = np.empty((7, 24, 4, 7))
+    table[..., 0] = np.sin(day)[:, None, None]
+    table[..., 1] = np.cos(day)[:, None, None]
+    table[..., 2] = np.sin(hour)[None, :, None]
+    table[..., 3] = np.cos(hour)[None, :, None]
+    table[..., 4] = np.sin(2 * np.pi * meal / 4)
+    table[..., 5] = np.cos(2 * np.pi * meal / 4)
+    table[..., 6] = meal / 3.0
+    table.flags.writeable = False
+    return table
+
+
+_TIME_TABLE = _build_time_table()
+
+
 def _encode_time_features(logged_at, meal_type: str) -> np.ndarray:
     """Encode time features (7D) matching MealSequenceRNN.encode_time_features()."""
     day_of_week = logged_at.weekday() if hasattr(logged_at, "weekday") else 0
     hour = logged_at.hour if hasattr(logged_at, "hour") else 12
+    return _TIME_TABLE[day_of_week, hour, _MEAL_TYPES.get(meal_type, 1)]
 
-    day_sin = np.sin(2 * np.pi * day_of_week / 7)
-    day_cos = np.cos(2 * np.pi * day_of_week / 7)
-    hour_sin = np.sin(2 * np.pi * hour / 24)
-    hour_cos = np.cos(2 * np.pi * hour / 24)
 
-    meal_types = {"breakfast": 0, "lunch": 1, "dinner": 2, "snack": 3}
-    meal_idx = meal_types.get(meal_type, 1)
-    meal_sin = np.sin(2 * np.pi * meal_idx / 4)
-    meal_cos = np.cos(2 * np.pi * meal_idx / 4)
-
-    return np.array([day_sin, day_cos, hour_sin, hour_cos, meal_sin, meal_cos,
-                     float(meal_idx) / 3.0])
+def _encode_time_features_batch(logs: pd.DataFrame) -> np.ndarray:
+    """(M, 7) time features for meal logs; row-wise _encode_time_features()."""
+    logged_at = logs["logged_at"].dt
+    if "meal_type" in logs.columns:
+        meal_idx = logs["meal_type"].map(_MEAL_TYPES).fillna(1).to_numpy(dtype=np.intp)
+    else:
+        meal_idx = np.ones(len(logs), dtype=np.intp)
+    return _TIME_TABLE[logged_at.weekday.to_numpy(), logged_at.hour.to_numpy(), meal_idx]
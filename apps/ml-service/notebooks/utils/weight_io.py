@@ -1,5 +1,17 @@
-"""Save and load trained model weights as .npz files."""
+"""Save and load trained model weights as .npz files.
 
+Alongside each .npz, the arrays are also written as one .npy file per
+weight in a sidecar directory (weights/vae_weights/, weights/rnn_weights/).
+Loading prefers the sidecar and memory-maps it, so a load is near
+zero-copy and repeated loads are served from the OS page cache. The .npz
+stays the artifact the ML service reads and the fallback when no sidecar
+exists.
+
+Weights are stored as C-contiguous float32, the layout the service runs
+inference in, so mapped arrays are usable without conversion.
+"""
+
+import warnings
 from pathlib import Path
 
 import numpy as np
@@ -37,48 +49,98 @@ def save_vae_weights(weights: dict[str, np.ndarray], path: str | None = None) ->
     """Save VAE weights to .npz file after validation."""
     save_path = Path(path) if path else WEIGHTS_DIR / "vae_weights.npz"
     _validate_weights(weights, VAE_WEIGHT_SHAPES, "VAE")
+    weights = _as_inference_arrays(weights)
     save_path.parent.mkdir(parents=True, exist_ok=True)
     np.savez(save_path, **weights)
+    _save_sidecar(save_path, weights)
     print(f"VAE weights saved to {save_path}")
     return save_path
 
 
 def load_vae_weights(path: str | None = None) -> dict[str, np.ndarray]:
-    """Load VAE weights from .npz file."""
+    """Load VAE weights, memory-mapped from the .npy sidecar when present."""
     load_path = Path(path) if path else WEIGHTS_DIR / "vae_weights.npz"
     if not load_path.exists():
         raise FileNotFoundError(f"VAE weights not found at {load_path}")
-    data = dict(np.load(load_path))
-    _validate_weights(data, VAE_WEIGHT_SHAPES, "VAE")
-    return data
+    data = _load_arrays(load_path, VAE_WEIGHT_SHAPES)
+    return _validate_weights(data, VAE_WEIGHT_SHAPES, "VAE", expected_dtype=np.float32)
 
 
 def save_rnn_weights(weights: dict[str, np.ndarray], path: str | None = None) -> Path:
     """Save RNN weights to .npz file after validation."""
     save_path = Path(path) if path else WEIGHTS_DIR / "rnn_weights.npz"
     _validate_weights(weights, RNN_WEIGHT_SHAPES, "RNN")
+    weights = _as_inference_arrays(weights)
     save_path.parent.mkdir(parents=True, exist_ok=True)
     np.savez(save_path, **weights)
+    _save_sidecar(save_path, weights)
     print(f"RNN weights saved to {save_path}")
     return save_path
 
 
 def load_rnn_weights(path: str | None = None) -> dict[str, np.ndarray]:
-    """Load RNN weights from .npz file."""
+    """Load RNN weights, memory-mapped from the .npy sidecar when present."""
     load_path = Path(path) if path else WEIGHTS_DIR / "rnn_weights.npz"
     if not load_path.exists():
         raise FileNotFoundError(f"RNN weights not found at {load_path}")
-    data = dict(np.load(load_path))
-    _validate_weights(data, RNN_WEIGHT_SHAPES, "RNN")
-    return data
+    data = _load_arrays(load_path, RNN_WEIGHT_SHAPES)
+    return _validate_weights(data, RNN_WEIGHT_SHAPES, "RNN", expected_dtype=np.float32)
+
+
+def _as_inference_arrays(weights: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """C-contiguous float32 copies (transposed torch weights are F-ordered)."""
+    return {
+        key: np.ascontiguousarray(arr, dtype=np.float32) for key, arr in weights.items()
+    }
+
+
+def _sidecar_dir(npz_path: Path) -> Path:
+    """Directory holding one .npy per weight, e.g. weights/vae_weights/."""
+    return npz_path.with_suffix("")
+
+
+def _save_sidecar(npz_path: Path, weights: dict[str, np.ndarray]) -> None:
+    """Write each weight as an uncompressed .npy next to the .npz."""
+    sidecar = _sidecar_dir(npz_path)
+    sidecar.mkdir(parents=True, exist_ok=True)
+    for key, arr in weights.items():
+        np.save(sidecar / f"{key}.npy", arr)
+
+
+def _load_arrays(
+    npz_path: Path, expected_shapes: dict[str, tuple]
+) -> dict[str, np.ndarray]:
+    """
+    Read weights as read-only memory maps from the sidecar directory.
+
+    Falls back to reading the .npz into memory when the sidecar is
+    missing, incomplete, or older than the .npz (e.g. the .npz was
+    replaced by hand).
+    """
+    sidecar = _sidecar_dir(npz_path)
+    files = {key: sidecar / f"{key}.npy" for key in expected_shapes}
+    npz_mtime = npz_path.stat().st_mtime
+    if all(f.exists() and f.stat().st_mtime >= npz_mtime for f in files.values()):
+        return {key: np.load(f, mmap_mode="r") for key, f in files.items()}
+    with np.load(npz_path) as data:
+        return dict(data)
 
 
 def _validate_weights(
     weights: dict[str, np.ndarray],
     expected_shapes: dict[str, tuple],
     model_name: str,
-) -> None:
-    """Validate that all expected weights are present with correct shapes."""
+    expected_dtype: np.dtype | None = None,
+) -> dict[str, np.ndarray]:
+    """Validate that all expected weights are present with correct shapes.
+
+    With expected_dtype, weights of another dtype or not C-contiguous
+    (e.g. .npz files written before weights were exported as float32)
+    are converted with a warning, so inference never silently pays for
+    casts or strided BLAS calls. Returns the possibly-converted weights.
+    """
+    checked = dict(weights)
+    converted = []
     for key, expected_shape in expected_shapes.items():
         if key not in weights:
             raise KeyError(f"{model_name} weight '{key}' missing from weights dict")
@@ -88,3 +150,16 @@ def _validate_weights(
                 f"{model_name} weight '{key}' has shape {actual_shape}, "
                 f"expected {expected_shape}"
             )
+        if expected_dtype is not None and (
+            weights[key].dtype != expected_dtype or not weights[key].flags.c_contiguous
+        ):
+            checked[key] = np.ascontiguousarray(weights[key], dtype=expected_dtype)
+            converted.append(key)
+
+    if converted:
+        warnings.warn(
+            f"{model_name} weights {converted} were not C-contiguous "
+            f"{np.dtype(expected_dtype)}; converted them. Re-save to avoid this.",
+            stacklevel=3,
+        )
+    return checked
@@ -0,0 +1,31 @@
+"""Shared fixtures for endpoint tests."""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@asynccontextmanager
+async def _mock_get_db():
+    yield MagicMock()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Create one test client with mocked database for the whole session."""
+    # Lifespan startup runs under TestClient, so its DB work is mocked too
+    with (
+        patch("app.main.init_db", new_callable=AsyncMock),
+        patch("app.main.close_db", new_callable=AsyncMock),
+        patch("app.main.get_db", _mock_get_db),
+        patch("app.main.fit_vae_normalization", new_callable=AsyncMock),
+        patch("app.main.refresh_embeddings_periodically", new_callable=AsyncMock),
+        patch("app.recommender.hybrid.get_db", _mock_get_db),
+        patch("app.routers.train.get_db", _mock_get_db),
+        TestClient(app) as test_client,
+    ):
+        yield test_client
@@ -0,0 +1,175 @@
+"""Tests for stored recipe embeddings and the queries that rank them."""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import psycopg
+import pytest
+
+from app.recommender.embeddings import (
+    refresh_embeddings_periodically,
+    refresh_recipe_embeddings,
+)
+from app.recommender.ranking import nearest_by_embedding
+
+RECIPE_1 = "00000000-0000-0000-0000-000000000001"
+RECIPE_2 = "00000000-0000-0000-0000-000000000002"
+RECIPE_3 = "00000000-0000-0000-0000-000000000003"
+
+
+class _Result:
+    """Stand-in for an AsyncCursor returned by conn.execute."""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self.rowcount = len(rows)
+
+    async def fetchall(self):
+        return self._rows
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for row in self._rows:
+            yield row
+
+
+def _recipe(recipe_id, **overrides):
+    recipe = {
+        "id": recipe_id,
+        "calories": 500,
+        "protein_g": 30,
+        "carbs_g": 50,
+        "fat_g": 20,
+        "sodium_mg": 800,
+        "fiber_g": 6,
+        "sugar_g": 10,
+        "ready_in_minutes": 25,
+        "servings": 2,
+        "diet_labels": ["vegetarian"],
+        "ingredient_vector": None,
+    }
+    recipe.update(overrides)
+    return recipe
+
+
+def _mock_conn(*results):
+    cur = MagicMock()
+    cur.executemany = AsyncMock()
+    conn = MagicMock()
+    conn.execute = AsyncMock(side_effect=list(results))
+    conn.commit = AsyncMock()
+    conn.rollback = AsyncMock()
+    conn.cursor.return_value.__aenter__.return_value = cur
+    return conn, cur
+
+
+@pytest.mark.asyncio
+async def test_refresh_embeds_in_batches_and_advances_last_id():
+    conn, cur = _mock_conn(
+        _Result([_recipe(RECIPE_1), _recipe(RECIPE_2)]),
+        _Result([_recipe(RECIPE_3)]),
+        _Result([]),
+    )
+
+    updated = await refresh_recipe_embeddings(conn, batch_size=2)
+
+    assert updated == 3
+    params = [call.args[1] for call in conn.execute.await_args_list]
+    assert [p["last_id"] for p in params] == [None, RECIPE_2, RECIPE_3]
+    assert all(p["batch_size"] == 2 for p in params)
+    # One commit per batch, plus the final empty one
+    assert conn.commit.await_count == 3
+
+    written = [call.args[1] for call in cur.executemany.await_args_list]
+    assert [[row[2] for row in batch] for batch in written] == [
+        [RECIPE_1, RECIPE_2],
+        [RECIPE_3],
+    ]
+    vae_embedding, rnn_embedding, _ = written[0][0]
+    assert vae_embedding.shape == (32,)
+    assert rnn_embedding.shape == (32,)
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_missing_filters_on_null_embeddings():
+    conn, _ = _mock_conn(_Result([]))
+    await refresh_recipe_embeddings(conn, only_missing=True)
+    assert "vae_embedding IS NULL" in conn.execute.await_args.args[0]
+
+    conn, _ = _mock_conn(_Result([]))
+    await refresh_recipe_embeddings(conn, only_missing=False)
+    assert "vae_embedding IS NULL" not in conn.execute.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_refresh_stores_null_for_zero_embeddings():
+    empty = _recipe(
+        RECIPE_1, calories=None, protein_g=None, carbs_g=None, fat_g=None
+    )
+    conn, cur = _mock_conn(_Result([empty]), _Result([]))
+
+    await refresh_recipe_embeddings(conn)
+
+    (_, rnn_embedding, _), = cur.executemany.await_args.args[1]
+    assert rnn_embedding is None
+
+
+@pytest.mark.asyncio
+async def test_periodic_refresh_stops_when_columns_are_missing():
+    @asynccontextmanager
+    async def _get_db():
+        yield MagicMock()
+
+    refresh = AsyncMock(
+        side_effect=[RuntimeError("boom"), psycopg.errors.UndefinedColumn()]
+    )
+    with (
+        patch("app.recommender.embeddings.get_db", _get_db),
+        patch("app.recommender.embeddings.refresh_recipe_embeddings", refresh),
+    ):
+        # Returns instead of looping forever; other errors are retried
+        await refresh_embeddings_periodically(0)
+
+    assert refresh.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_nearest_skips_zero_embedding():
+    conn, _ = _mock_conn()
+    assert await nearest_by_embedding(conn, "rnn_embedding", np.zeros(32), 10, None, "rnn") is None
+    conn.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_nearest_rolls_back_when_column_is_missing():
+    conn, _ = _mock_conn(psycopg.errors.UndefinedColumn())
+    assert await nearest_by_embedding(conn, "rnn_embedding", np.ones(32), 10, None, "rnn") is None
+    conn.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_nearest_returns_none_without_rows():
+    conn, _ = _mock_conn(_Result([]))
+    assert await nearest_by_embedding(conn, "vae_embedding", np.ones(32), 10, None, "vae") is None
+
+
+@pytest.mark.asyncio
+async def test_nearest_returns_scored_rows():
+    conn, _ = _mock_conn(
+        _Result([{"recipe_id": RECIPE_1, "title": "Chili", "score": 0.9}])
+    )
+    rows = await nearest_by_embedding(conn, "vae_embedding", np.ones(32), 10, None, "vae")
+    assert rows == [{"recipe_id": RECIPE_1, "title": "Chili", "score": 0.9, "source": "vae"}]
+
+
+@pytest.mark.asyncio
+async def test_nearest_widens_ef_search_for_large_limits():
+    conn, _ = _mock_conn(_Result([]), _Result([]))
+    await nearest_by_embedding(conn, "rnn_embedding", np.ones(32), 100, [RECIPE_1], "rnn")
+
+    set_config = conn.execute.await_args_list[0]
+    assert "hnsw.ef_search" in set_config.args[0]
+    assert set_config.args[1] == ("101",)
@@ -0,0 +1,66 @@
+"""Tests for knowledge-based nutrition scoring."""
+
+import numpy as np
+import pytest
+
+from app.recommender.knowledge_based import DIET_CONSTRAINTS, NutritionScore
+
+RECIPES = [
+    {
+        "calories": 550,
+        "protein_g": 35,
+        "carbs_g": 60,
+        "fat_g": 18,
+        "fiber_g": 9,
+        "allergens": [],
+        "diet_labels": ["vegetarian", "vegan"],
+    },
+    {
+        "calories": 800,
+        "protein_g": 12,
+        "carbs_g": 20,
+        "fat_g": 70,
+        "fiber_g": 1,
+        "allergens": ["Dairy"],
+        "diet_labels": ["ketogenic"],
+    },
+    {
+        "calories": 300,
+        "protein_g": None,
+        "carbs_g": 45,
+        "fat_g": None,
+        "fiber_g": None,
+        "allergens": ["gluten"],
+        "diet_labels": ["Paleo"],
+    },
+    # No, zero and negative calories skip the calorie factor
+    {"calories": None, "protein_g": 10, "carbs_g": 10, "fat_g": 5, "fiber_g": 2},
+    {"calories": 0, "protein_g": 0, "carbs_g": 0, "fat_g": 0, "fiber_g": 0},
+    {"calories": -120, "protein_g": 5, "carbs_g": 15, "fat_g": 3, "fiber_g": 4},
+    {"allergens": None, "diet_labels": None},
+]
+
+
+@pytest.mark.parametrize("diet_type", [None, *DIET_CONSTRAINTS, "unknown"])
+@pytest.mark.parametrize("meal_type", ["breakfast", "lunch", "dinner", "snack", "brunch"])
+def test_batch_scores_match_per_recipe_scores(diet_type, meal_type):
+    scorer = NutritionScore(calorie_target=2200, protein_target=120, diet_type=diet_type)
+
+    expected = [scorer.score_recipe(r, meal_type) for r in RECIPES]
+
+    np.testing.assert_allclose(scorer.score_recipes_batch(RECIPES, meal_type), expected)
+
+
+def test_batch_of_no_recipes_is_empty():
+    assert NutritionScore().score_recipes_batch([]).shape == (0,)
+
+
+def test_diet_labels_match_case_sensitively_like_the_candidate_query():
+    scorer = NutritionScore(diet_type="paleo")
+    recipe = {"calories": 500, "protein_g": 30, "carbs_g": 40, "fat_g": 20, "fiber_g": 5}
+
+    labeled = scorer.score_recipe({**recipe, "diet_labels": ["paleo"]})
+    miscased = scorer.score_recipe({**recipe, "diet_labels": ["Paleo"]})
+
+    assert miscased == scorer.score_recipe({**recipe, "diet_labels": []})
+    assert labeled > miscased
@@ -0,0 +1,164 @@
+"""Tests for batched, cached taste profile loading."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from cachetools import TTLCache
+
+from app.recommender import profile
+from app.recommender.hybrid import retrain_user_model
+from app.recommender.profile import UserProfileLoader, get_profile, invalidate_profile
+
+USER_A = "00000000-0000-0000-0000-00000000000a"
+USER_B = "00000000-0000-0000-0000-00000000000b"
+
+
+def _mock_db(rows):
+    result = MagicMock()
+    result.fetchall = AsyncMock(return_value=rows)
+    conn = MagicMock()
+    conn.execute = AsyncMock(return_value=result)
+
+    @asynccontextmanager
+    async def _get_db():
+        yield conn
+
+    return conn, _get_db
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_query():
+    conn, get_db = _mock_db([{"user_id": USER_A, "interaction_count": 7}])
+    loader = UserProfileLoader(wait_ms=5, max_batch=100)
+
+    with patch("app.recommender.profile.get_db", get_db):
+        a, b, a_again = await asyncio.gather(
+            loader.load(USER_A), loader.load(USER_B), loader.load(USER_A.upper())
+        )
+
+    assert conn.execute.await_count == 1
+    assert sorted(conn.execute.await_args.args[1][0]) == [USER_A, USER_B]
+    assert a["interaction_count"] == 7
+    assert a_again is a
+    assert b is None
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_early():
+    conn, get_db = _mock_db([])
+    loader = UserProfileLoader(wait_ms=10_000, max_batch=2)
+
+    with patch("app.recommender.profile.get_db", get_db):
+        results = await asyncio.wait_for(
+            asyncio.gather(loader.load(USER_A), loader.load(USER_B)), timeout=1
+        )
+
+    assert results == [None, None]
+    assert conn.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_malformed_user_id_is_rejected():
+    loader = UserProfileLoader(wait_ms=5, max_batch=100)
+    with pytest.raises(ValueError):
+        await loader.load("not-a-uuid")
+
+
+@pytest.fixture
+def load(monkeypatch):
+    """Fresh profile cache with a mocked loader; the mock counts DB loads."""
+    clock = [0.0]
+    cache = TTLCache(maxsize=100, ttl=60, timer=lambda: clock[0])
+    monkeypatch.setattr(profile, "_profile_cache", cache)
+    monkeypatch.setattr(profile, "_profile_generations", {})
+    monkeypatch.setattr(profile, "_profile_lock", asyncio.Lock())
+    mock = AsyncMock(side_effect=lambda user_id: {"user_id": user_id})
+    monkeypatch.setattr(profile._profile_loader, "load", mock)
+    mock.clock = clock
+    return mock
+
+
+@pytest.mark.asyncio
+async def test_profiles_are_cached_until_ttl(load):
+    first = await get_profile(USER_A)
+    assert await get_profile(USER_A.upper()) is first
+    assert load.await_count == 1
+
+    load.clock[0] = 61
+    assert await get_profile(USER_A) == first
+    assert load.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_profiles_are_cached(load):
+    load.side_effect = None
+    load.return_value = None
+
+    assert await get_profile(USER_A) is None
+    assert await get_profile(USER_A) is None
+    assert load.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_entry_expiring_between_check_and_read_reloads(load, monkeypatch):
+    class _ExpiringCache(dict):
+        """Reports the key as present, then has it expire before the read."""
+
+        def __contains__(self, key):
+            return True
+
+        def __getitem__(self, key):
+            raise KeyError(key)
+
+    monkeypatch.setattr(profile, "_profile_cache", _ExpiringCache())
+
+    assert await get_profile(USER_A) == {"user_id": USER_A}
+    assert load.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_cached_profile(load):
+    await get_profile(USER_A)
+    await invalidate_profile(USER_A.upper())
+    await get_profile(USER_A)
+    assert load.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_load_in_flight_during_invalidate_is_not_cached(load):
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_load(user_id):
+        started.set()
+        await release.wait()
+        return {"user_id": user_id, "stale": True}
+
+    load.side_effect = slow_load
+    pending = asyncio.create_task(get_profile(USER_A))
+    await started.wait()
+    await invalidate_profile(USER_A)
+    release.set()
+    assert (await pending)["stale"]
+
+    load.side_effect = lambda user_id: {"user_id": user_id, "stale": False}
+    assert not (await get_profile(USER_A))["stale"]
+    assert load.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_retrain_invalidates_cached_profile(load):
+    await get_profile(USER_A)
+
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+    conn.commit = AsyncMock()
+    with patch(
+        "app.recommender.hybrid._preference_vector_from_db",
+        AsyncMock(return_value=(0, None)),
+    ):
+        await retrain_user_model(conn, USER_A)
+
+    await get_profile(USER_A)
+    assert load.await_count == 2
@@ -1,42 +1,25 @@
 """Tests for recommendation endpoints."""
 
 from contextlib import asynccontextmanager
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
-from httpx import ASGITransport, AsyncClient
+from fastapi.testclient import TestClient
+from psycopg_pool import PoolTimeout
 
-from app.main import app
 from app.models.schemas import RecommendResponse, RecipeScore
+from app.recommender.hybrid import get_hybrid_recommendations
 
 
-@asynccontextmanager
-async def _mock_get_db():
-    yield MagicMock()
-
-
-@pytest.fixture
-async def client():
-    """Create a test client with mocked database."""
-    with patch("app.db.init_db", new_callable=AsyncMock):
-        with patch("app.db.close_db", new_callable=AsyncMock):
-            with patch("app.routers.recommend.get_db", _mock_get_db):
-                transport = ASGITransport(app=app)
-                async with AsyncClient(transport=transport, base_url="http://test") as ac:
-                    yield ac
-
-
-@pytest.mark.asyncio
-async def test_health(client: AsyncClient):
-    response = await client.get("/health")
+def test_health(client: TestClient):
+    response = client.get("/health")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
     assert data["service"] == "ml-service"
 
 
-@pytest.mark.asyncio
-async def test_recommend_returns_recommendations(client: AsyncClient):
+def test_recommend_returns_recommendations(client: TestClient):
     mock_response = RecommendResponse(
         user_id="user-001",
         recommendations=[
@@ -61,7 +44,7 @@ async def test_recommend_returns_recommendations(client: AsyncClient):
         new_callable=AsyncMock,
         return_value=mock_response,
     ):
-        response = await client.post(
+        response = client.post(
             "/recommend",
             json={"user_id": "user-001", "top_n": 10},
         )
@@ -74,8 +57,7 @@ async def test_recommend_returns_recommendations(client: AsyncClient):
     assert data["is_cold_start"] is False
 
 
-@pytest.mark.asyncio
-async def test_recommend_cold_start(client: AsyncClient):
+def test_recommend_cold_start(client: TestClient):
     mock_response = RecommendResponse(
         user_id="new-user",
         recommendations=[
@@ -94,7 +76,7 @@ async def test_recommend_cold_start(client: AsyncClient):
         new_callable=AsyncMock,
         return_value=mock_response,
     ):
-        response = await client.post(
+        response = client.post(
             "/recommend",
             json={"user_id": "new-user", "top_n": 5},
         )
@@ -105,16 +87,43 @@ async def test_recommend_cold_start(client: AsyncClient):
     assert data["recommendations"][0]["source"] == "popular"
 
 
-@pytest.mark.asyncio
-async def test_recommend_validates_top_n(client: AsyncClient):
-    response = await client.post(
+def test_recommend_validates_top_n(client: TestClient):
+    response = client.post(
         "/recommend",
         json={"user_id": "user-001", "top_n": 0},
     )
     assert response.status_code == 422
 
 
-@pytest.mark.asyncio
-async def test_recommend_validates_missing_user_id(client: AsyncClient):
-    response = await client.post("/recommend", json={"top_n": 10})
+def test_recommend_validates_missing_user_id(client: TestClient):
+    response = client.post("/recommend", json={"top_n": 10})
     assert response.status_code == 422
+
+
+def test_recommend_returns_503_when_pool_exhausted(client: TestClient):
+    with patch(
+        "app.routers.recommend.get_hybrid_recommendations",
+        new_callable=AsyncMock,
+        side_effect=PoolTimeout("couldn't get a connection"),
+    ):
+        response = client.post("/recommend", json={"user_id": "user-001", "top_n": 5})
+
+    assert response.status_code == 503
+
+
+async def test_hybrid_raises_pool_timeout_instead_of_popular_fallback():
+    @asynccontextmanager
+    async def _exhausted_get_db():
+        raise PoolTimeout("couldn't get a connection")
+        yield
+
+    fallback = AsyncMock()
+    with (
+        patch("app.recommender.hybrid.get_profile", new_callable=AsyncMock, return_value=None),
+        patch("app.recommender.hybrid.get_db", _exhausted_get_db),
+        patch("app.recommender.hybrid._fallback_popular", fallback),
+    ):
+        with pytest.raises(PoolTimeout):
+            await get_hybrid_recommendations("user-001", top_n=5)
+
+    fallback.assert_not_called()